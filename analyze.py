@@ -0,0 +1,1028 @@
+import bisect
+import functools
+import os
+import pickle
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from entities import EntityIndex
+from profiling import stage_timer
+from storage import open_paper_store, open_store
+
+LEADERBOARD_LENGTH = 10
+SCHOOL_KEYWORDS = ['university', 'college', 'school', 'institute', 'polytechnic', 'eth', 'epfl', 'uc berkeley', 'mit', 'kaist', 'uiuc', 'ucla', 'cmu', 'politecnico di milano', 'uc san diego', 'universität']
+
+def top_counts(series: pd.Series, length: int):
+    # value_counts() on a categorical also lists categories that were filtered out.
+    counts = series.value_counts()
+    return counts[counts > 0].head(length)
+
+def _group_offsets(codes: np.ndarray, n_groups: int):
+    # CSR layout: rows of group g are order[offsets[g]:offsets[g + 1]], in their original order.
+    valid = np.flatnonzero(codes >= 0)
+    order = valid[np.argsort(codes[valid], kind="stable")]
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes[valid], minlength=n_groups), out=offsets[1:])
+    return order, offsets
+
+class PaperIndex:
+    # Normalized view of the (Conference, Year, Title, Author, Affiliation) frame
+    # built once per dataset load: integer IDs for authors, affiliations and papers,
+    # row lists per author and per paper, and (author, affiliation) row counts
+    # indexed both ways, so analyze commands never rescan the full frame. With an
+    # EntityIndex the author and affiliation IDs are its canonical entities;
+    # without one every distinct string is its own ID.
+    def __init__(self, df: pd.DataFrame, entities: EntityIndex = None):
+        self.df = df
+        self.entities = entities
+        if entities is not None:
+            author_codes, author_names = entities.author_codes(df["Author"]), entities.author_names
+            affiliation_codes, affiliation_names = entities.affiliation_codes(df["Affiliation"]), entities.affiliation_names
+        else:
+            author_codes, author_names = pd.factorize(df["Author"])
+            affiliation_codes, affiliation_names = pd.factorize(df["Affiliation"])
+        # Rows with a missing title get -1 (no paper), as groupby drops them.
+        paper_codes = df.groupby(["Conference", "Year", "Title"], sort=False, observed=True).ngroup()
+        paper_codes = paper_codes.fillna(-1).to_numpy(dtype=np.int64)
+        self.author_names = np.asarray(author_names, dtype=object)
+        self.affiliation_names = np.asarray(affiliation_names, dtype=object)
+        self.author_codes = author_codes
+        self.affiliation_codes = affiliation_codes
+        self.paper_codes = paper_codes
+        n_authors, n_affiliations = len(self.author_names), len(self.affiliation_names)
+        n_papers = int(paper_codes.max()) + 1 if len(paper_codes) else 0
+
+        self.author_rows, self.author_offsets = _group_offsets(author_codes, n_authors)
+        self.paper_rows, self.paper_offsets = _group_offsets(paper_codes, n_papers)
+        self.paper_counts = np.diff(self.author_offsets)
+        # Ties keep first-appearance order, like value_counts().
+        self.authors_by_count = np.lexsort((np.arange(n_authors), -self.paper_counts))
+
+        self.authors_by_lower_name = {}
+        for id, name in enumerate(self.author_names):
+            self.authors_by_lower_name.setdefault(str(name).lower(), []).append(id)
+        if entities is not None:
+            # Every spelling of a resolved author finds it.
+            for name, id in entities.author_ids.items():
+                ids = self.authors_by_lower_name.setdefault(str(name).lower(), [])
+                if id not in ids:
+                    ids.append(id)
+
+        with_affiliation = (author_codes >= 0) & (affiliation_codes >= 0)
+        pair_keys = author_codes[with_affiliation].astype(np.int64) * max(n_affiliations, 1) + affiliation_codes[with_affiliation]
+        pair_keys, pair_counts = np.unique(pair_keys, return_counts=True)
+        self.pair_authors = pair_keys // max(n_affiliations, 1)
+        self.pair_affiliations = pair_keys % max(n_affiliations, 1)
+        self.pair_counts = pair_counts
+        self.pairs_by_author, self.pair_author_offsets = _group_offsets(self.pair_authors, n_authors)
+        self.pairs_by_affiliation, self.pair_affiliation_offsets = _group_offsets(self.pair_affiliations, n_affiliations)
+        # Rank of each affiliation name, used to break modal-affiliation ties like Series.mode().
+        self.affiliation_rank = np.empty(n_affiliations, dtype=np.int64)
+        self.affiliation_rank[np.argsort(self.affiliation_names.astype(str), kind="stable")] = np.arange(n_affiliations)
+        self.modal_affiliations = np.full(n_authors, -1, dtype=np.int64)
+        by_mode = np.lexsort((self.affiliation_rank[self.pair_affiliations], -self.pair_counts, self.pair_authors))
+        first = np.ones(len(by_mode), dtype=bool)
+        first[1:] = self.pair_authors[by_mode][1:] != self.pair_authors[by_mode][:-1]
+        self.modal_affiliations[self.pair_authors[by_mode][first]] = self.pair_affiliations[by_mode][first]
+        self._leaderboards = {}
+        self._is_school = None
+
+    def leaderboard(self, category: str):
+        # Affiliations are classified once per distinct string and each ranking is
+        # sorted once; the index is rebuilt whenever the dataset is reloaded.
+        if category not in self._leaderboards:
+            if category == 'authors':
+                ids = self.authors_by_count
+                self._leaderboards[category] = self.author_names[ids], self.paper_counts[ids]
+            else:
+                counts = np.bincount(self.affiliation_codes[self.affiliation_codes >= 0], minlength=len(self.affiliation_names))
+                ids = np.lexsort((np.arange(len(counts)), -counts))
+                if category != 'groups':
+                    ids = ids[self.school_mask()[ids] == (category == 'schools')]
+                self._leaderboards[category] = self.affiliation_names[ids], counts[ids]
+        return self._leaderboards[category]
+
+    def school_mask(self):
+        if self._is_school is None:
+            self._is_school = self.affiliations_matching('|'.join(SCHOOL_KEYWORDS), as_mask=True)
+        return self._is_school
+
+    def affiliations_matching(self, pattern: str, as_mask: bool = False):
+        matches = pd.Series(self.affiliation_names).str.contains(pattern, case=False, na=False).to_numpy()
+        return matches if as_mask else np.flatnonzero(matches)
+
+    def affiliations_named(self, institution: str):
+        # Substring matches on the canonical names, plus the entity the query itself
+        # resolves to, so "MIT" also finds "Massachusetts Institute of Technology".
+        matches = self.affiliations_matching(institution)
+        if self.entities is not None:
+            # Canonical names keep only the primary part of "Stanford University/Pinterest",
+            # so every raw spelling is matched too and mapped to its entity.
+            raw_names = pd.Series(list(self.entities.affiliation_ids.keys()), dtype=object)
+            raw_ids = np.fromiter(self.entities.affiliation_ids.values(), dtype=np.int64, count=len(raw_names))
+            raw_matches = raw_ids[raw_names.str.contains(institution, case=False, na=False).to_numpy()]
+            matches = np.union1d(matches, raw_matches).astype(np.int64)
+            id = self.entities.affiliation_ids.get(institution)
+            if id is None:
+                _, signature, _ = EntityIndex.affiliation_signature(institution)
+                id = self.entities.affiliation_ids_by_signature.get(signature)
+            if id is not None and id not in matches:
+                matches = np.sort(np.append(matches, id))
+        return matches
+
+    def _pairs_of_affiliations(self, affiliation_ids):
+        offsets = self.pair_affiliation_offsets
+        slices = [self.pairs_by_affiliation[offsets[a]:offsets[a + 1]] for a in affiliation_ids]
+        return np.concatenate(slices) if slices else np.array([], dtype=np.int64)
+
+    def top_authors(self, length: int, affiliation_ids=None):
+        if affiliation_ids is None:
+            top = self.authors_by_count[:length]
+            return top, self.paper_counts[top]
+        pairs = self._pairs_of_affiliations(affiliation_ids)
+        authors, inverse = np.unique(self.pair_authors[pairs], return_inverse=True)
+        counts = np.bincount(inverse, weights=self.pair_counts[pairs]).astype(np.int64)
+        order = np.lexsort((authors, -counts))[:length]
+        return authors[order], counts[order]
+
+    def modal_affiliation(self, author_ids, affiliation_ids=None):
+        if affiliation_ids is None and len(author_ids) == 1:
+            modal = self.modal_affiliations[author_ids[0]]
+            return self.affiliation_names[modal] if modal >= 0 else None
+        offsets = self.pair_author_offsets
+        pairs = np.concatenate([self.pairs_by_author[offsets[a]:offsets[a + 1]] for a in author_ids])
+        if affiliation_ids is not None:
+            pairs = pairs[np.isin(self.pair_affiliations[pairs], affiliation_ids)]
+        if len(pairs) == 0:
+            return None
+        affiliations, inverse = np.unique(self.pair_affiliations[pairs], return_inverse=True)
+        counts = np.bincount(inverse, weights=self.pair_counts[pairs])
+        best = np.lexsort((self.affiliation_rank[affiliations], -counts))[0]
+        return self.affiliation_names[affiliations[best]]
+
+    def author_ids_named(self, name: str):
+        return self.authors_by_lower_name.get(name.lower(), [])
+
+    def rows_of_authors(self, author_ids):
+        offsets = self.author_offsets
+        rows = [self.author_rows[offsets[a]:offsets[a + 1]] for a in author_ids]
+        return np.sort(np.concatenate(rows)) if rows else np.array([], dtype=np.int64)
+
+    def paper_titles(self):
+        return self.df["Title"].to_numpy()[self.paper_rows[self.paper_offsets[:-1]]]
+
+    def papers(self, paper_ids):
+        authors = self.df["Author"].to_numpy()
+        results = []
+        for paper in paper_ids:
+            rows = self.paper_rows[self.paper_offsets[paper]:self.paper_offsets[paper + 1]]
+            first = self.df.iloc[rows[0]]
+            results.append((first["Conference"], first["Year"], first["Title"], list(authors[rows])))
+        return results
+
+    def find_papers(self, keyword: str):
+        first_rows = self.paper_rows[self.paper_offsets[:-1]]
+        titles = self.df["Title"].to_numpy()[first_rows]
+        matches = np.flatnonzero(pd.Series(titles).str.contains(keyword, case=False, na=False).to_numpy())
+        # Same ordering as the groupby(['Conference', 'Year', 'Title']) it replaces.
+        papers = self.df.iloc[first_rows[matches]][["Conference", "Year", "Title"]]
+        papers = papers.assign(_paper=matches).sort_values(["Conference", "Year", "Title"])
+        authors = self.df["Author"].to_numpy()
+        results = []
+        for conference, year, title, paper in papers.itertuples(index=False):
+            rows = self.paper_rows[self.paper_offsets[paper]:self.paper_offsets[paper + 1]]
+            results.append((conference, year, title, list(authors[rows])))
+        return results
+
+class CoauthorGraph:
+    # Co-authorship graph over the author IDs of a PaperIndex, as symmetric CSR
+    # arrays: the collaborators of author a are neighbors[indptr[a]:indptr[a + 1]]
+    # and weights holds the number of papers they wrote together. Built once per
+    # dataset load from the per-paper row lists, without a Python loop over papers.
+    damping = 0.85
+
+    def __init__(self, index: PaperIndex):
+        n_authors = len(index.author_names)
+        rows = index.paper_rows
+        authors = index.author_codes[rows]
+        papers = np.repeat(np.arange(len(index.paper_offsets) - 1), np.diff(index.paper_offsets))
+        # One entry per (paper, author), in case a name is listed twice on a paper.
+        keys = np.unique(papers[authors >= 0].astype(np.int64) * max(n_authors, 1) + authors[authors >= 0])
+        papers, authors = keys // max(n_authors, 1), keys % max(n_authors, 1)
+        starts = np.flatnonzero(np.r_[True, papers[1:] != papers[:-1]])
+        sizes = np.diff(np.r_[starts, len(papers)])
+        # Every ordered pair of positions within a paper: position i is repeated
+        # size-of-its-paper times and paired with each position of the same paper.
+        size_of = np.repeat(sizes, sizes)
+        source = np.repeat(np.arange(len(papers)), size_of)
+        block_starts = np.repeat(np.cumsum(size_of) - size_of, size_of)
+        target = np.repeat(np.repeat(starts, sizes), size_of) + np.arange(len(source)) - block_starts
+        distinct = source != target
+        edge_keys = authors[source[distinct]] * max(n_authors, 1) + authors[target[distinct]]
+        edge_keys, weights = np.unique(edge_keys, return_counts=True)
+
+        self.n_authors = n_authors
+        self.sources = edge_keys // max(n_authors, 1)
+        self.neighbors = edge_keys % max(n_authors, 1)
+        self.weights = weights
+        self.indptr = np.zeros(n_authors + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources, minlength=n_authors), out=self.indptr[1:])
+        self.degree = np.diff(self.indptr)
+        self.strength = np.bincount(self.sources, weights=weights, minlength=n_authors)
+        self._pagerank = None
+
+    def summary(self):
+        n_edges = len(self.neighbors) // 2
+        isolated = int((self.degree == 0).sum())
+        return f"{self.n_authors} authors, {n_edges} co-author pairs, {isolated} without co-authors"
+
+    def collaborators(self, author_ids):
+        # Co-authors of any of author_ids (the spellings of one person), by joint papers.
+        slices = [np.arange(self.indptr[a], self.indptr[a + 1]) for a in author_ids]
+        edges = np.concatenate(slices) if slices else np.array([], dtype=np.int64)
+        neighbors, inverse = np.unique(self.neighbors[edges], return_inverse=True)
+        counts = np.bincount(inverse, weights=self.weights[edges]).astype(np.int64)
+        keep = ~np.isin(neighbors, author_ids)
+        neighbors, counts = neighbors[keep], counts[keep]
+        order = np.lexsort((neighbors, -counts))
+        return neighbors[order], counts[order]
+
+    def neighborhood(self, author_ids, hops: int):
+        # Breadth-first expansion; returns the hop distance of every reached author (-1 if unreached).
+        distance = np.full(self.n_authors, -1, dtype=np.int64)
+        frontier = np.unique(np.asarray(author_ids, dtype=np.int64))
+        distance[frontier] = 0
+        for hop in range(1, hops + 1):
+            if len(frontier) == 0:
+                break
+            starts, ends = self.indptr[frontier], self.indptr[frontier + 1]
+            lengths = ends - starts
+            edges = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            reached = np.unique(self.neighbors[edges])
+            frontier = reached[distance[reached] < 0]
+            distance[frontier] = hop
+        return distance
+
+    def pagerank(self, tolerance: float = 1e-10, max_iterations: int = 100):
+        # Weighted PageRank by power iteration: each step is one gather and one
+        # bincount over the edge arrays. Authors without co-authors spread their
+        # rank uniformly. Computed once and kept for later queries.
+        if self._pagerank is None:
+            n = max(self.n_authors, 1)
+            rank = np.full(self.n_authors, 1.0 / n)
+            dangling = self.strength == 0
+            share = np.divide(self.weights, self.strength[self.sources])
+            for _ in range(max_iterations):
+                spread = np.bincount(self.neighbors, weights=rank[self.sources] * share, minlength=self.n_authors)
+                updated = (1 - self.damping) / n + self.damping * (spread + rank[dangling].sum() / n)
+                converged = np.abs(updated - rank).sum() < tolerance
+                rank = updated
+                if converged:
+                    break
+            self._pagerank = rank
+        return self._pagerank
+
+    def degree_centrality(self):
+        return self.degree / max(self.n_authors - 1, 1)
+
+    def rank(self, author_ids=None, length: int = None):
+        # Author IDs ordered by PageRank, ties by number of co-authors.
+        pagerank = self.pagerank()
+        ids = np.arange(self.n_authors) if author_ids is None else np.asarray(author_ids, dtype=np.int64)
+        if length is not None and length < len(ids):
+            # Partition first so ranking every author only sorts the top of the list.
+            ids = ids[np.argpartition(-pagerank[ids], length - 1)[:length]]
+        return ids[np.lexsort((ids, -self.degree[ids], -pagerank[ids]))][:length]
+
+YEAR_WINDOW_REGEX = re.compile(r"^(\d{4})(?:-(\d{4}))?$")
+
+def parse_year_window(text: str):
+    # "2022-2024" -> (2022, 2024), "2023" -> (2023, 2023), anything else -> None.
+    match = YEAR_WINDOW_REGEX.match(text.strip())
+    if not match:
+        return None
+    start, end = int(match[1]), int(match[2] or match[1])
+    return (start, end) if start <= end else (end, start)
+
+class TrendCube:
+    # Row counts of every author, affiliation and (author, affiliation) pair of a
+    # PaperIndex per conference and year, as dense [entity, conference, year]
+    # arrays made with one bincount each. Year-windowed leaderboards and growth
+    # rankings are slices and sums over these, never a re-filter of the frame.
+    def __init__(self, index: PaperIndex):
+        df = index.df
+        conference_codes, conferences = pd.factorize(df["Conference"], sort=True)
+        self.conferences = [str(c) for c in conferences]
+        years = df["Year"].to_numpy().astype(np.int64)
+        self.years = np.arange(years.min(), years.max() + 1) if len(years) else np.array([], dtype=np.int64)
+        n_cells = len(self.conferences) * len(self.years)
+        cells = conference_codes * len(self.years) + (years - (self.years[0] if len(self.years) else 0))
+
+        n_affiliations = max(len(index.affiliation_names), 1)
+        pair_keys = index.pair_authors * n_affiliations + index.pair_affiliations
+        with_pair = (index.author_codes >= 0) & (index.affiliation_codes >= 0)
+        pair_codes = np.full(len(df), -1, dtype=np.int64)
+        pair_codes[with_pair] = np.searchsorted(
+            pair_keys, index.author_codes[with_pair].astype(np.int64) * n_affiliations + index.affiliation_codes[with_pair]
+        )
+        self.index = index
+        self.authors = self._count(index.author_codes, len(index.author_names), cells, n_cells)
+        self.affiliations = self._count(index.affiliation_codes, len(index.affiliation_names), cells, n_cells)
+        self.pairs = self._count(pair_codes, len(pair_keys), cells, n_cells)
+
+    def _count(self, codes, n: int, cells, n_cells: int):
+        valid = codes >= 0
+        counts = np.bincount(codes[valid].astype(np.int64) * n_cells + cells[valid], minlength=n * n_cells)
+        return counts.astype(np.int32).reshape(n, len(self.conferences), len(self.years))
+
+    def year_slice(self, years=None):
+        if years is None or not len(self.years):
+            return slice(None)
+        start, end = years
+        first = int(self.years[0])
+        return slice(max(start - first, 0), max(end - first + 1, 0))
+
+    def conference_slice(self, conference: str = None):
+        if conference is None:
+            return slice(None)
+        matches = [i for i, c in enumerate(self.conferences) if c.lower() == conference.lower()]
+        if not matches:
+            raise ValueError(f"Unknown conference '{conference}'. Known: {', '.join(self.conferences)}")
+        return slice(matches[0], matches[0] + 1)
+
+    def _cube(self, category: str):
+        return self.authors if category == 'authors' else self.affiliations
+
+    def _candidates(self, category: str):
+        if category in ('authors', 'groups'):
+            return None
+        return np.flatnonzero(self.index.school_mask() == (category == 'schools'))
+
+    def leaderboard(self, category: str, years=None):
+        counts = self._cube(category)[:, :, self.year_slice(years)].sum(axis=(1, 2))
+        ids = self._candidates(category)
+        ids = np.arange(len(counts)) if ids is None else ids
+        ids = ids[counts[ids] > 0]
+        # Ties keep first-appearance order, like the all-time leaderboards.
+        ids = ids[np.lexsort((ids, -counts[ids]))]
+        names = self.index.author_names if category == 'authors' else self.index.affiliation_names
+        return names[ids], counts[ids]
+
+    def top_authors(self, length: int, affiliation_ids, years=None):
+        pairs = self.index._pairs_of_affiliations(affiliation_ids)
+        counts = self.pairs[pairs][:, :, self.year_slice(years)].sum(axis=(1, 2))
+        authors, inverse = np.unique(self.index.pair_authors[pairs], return_inverse=True)
+        counts = np.bincount(inverse, weights=counts, minlength=len(authors)).astype(np.int64)
+        order = np.lexsort((authors, -counts))[:length]
+        order = order[counts[order] > 0]
+        return authors[order], counts[order]
+
+    def trending(self, category: str, years, length: int, conference: str = None):
+        # Least-squares slope of the yearly counts over the window, in papers per year.
+        window = self.year_slice(years)
+        window_years = self.years[window]
+        if len(window_years) < 2:
+            raise ValueError("A trend needs a window of at least two years of data.")
+        series = self._cube(category)[:, self.conference_slice(conference), window].sum(axis=1)
+        ids = self._candidates(category)
+        if ids is not None:
+            series = series[ids]
+        centered = window_years - window_years.mean()
+        slopes = series @ centered / (centered @ centered)
+        rising = np.flatnonzero(slopes > 0)
+        if length < len(rising):
+            rising = rising[np.argpartition(-slopes[rising], length - 1)[:length]]
+        rising = rising[np.lexsort((rising, -series[rising, -1], -slopes[rising]))]
+        ids = rising if ids is None else ids[rising]
+        names = self.index.author_names if category == 'authors' else self.index.affiliation_names
+        return window_years, names[ids], series[rising], slopes[rising]
+
+TOKEN_REGEX = re.compile(r"\w+")
+QUERY_REGEX = re.compile(r'"([^"]*)"|(\S+)')
+
+class TitleSearchIndex:
+    # BM25 inverted index over the deduplicated paper titles of a PaperIndex
+    # (document i is paper i). Postings are CSR arrays over a sorted vocabulary,
+    # so a prefix query is a contiguous range of term IDs. Query syntax: plain
+    # words must all match (falling back to any word), "quoted words" match as
+    # a phrase and word* matches by prefix.
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, titles):
+        tokens = [TOKEN_REGEX.findall(str(title).lower()) for title in titles]
+        self.vocabulary = sorted(set(token for doc in tokens for token in doc))
+        term_ids = {term: i for i, term in enumerate(self.vocabulary)}
+        n_docs, n_terms = len(tokens), len(self.vocabulary)
+
+        self.doc_lengths = np.array([len(doc) for doc in tokens], dtype=np.int64)
+        self.doc_offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(self.doc_lengths, out=self.doc_offsets[1:])
+        self.doc_terms = np.fromiter((term_ids[t] for doc in tokens for t in doc), dtype=np.int64, count=int(self.doc_offsets[-1]))
+        self.avg_length = self.doc_lengths.mean() if n_docs else 0.0
+
+        keys = self.doc_terms * max(n_docs, 1) + np.repeat(np.arange(n_docs), self.doc_lengths)
+        keys, frequencies = np.unique(keys, return_counts=True)
+        posting_terms = keys // max(n_docs, 1)
+        self.posting_docs = keys % max(n_docs, 1)
+        self.posting_frequencies = frequencies
+        self.term_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=n_terms), out=self.term_offsets[1:])
+        document_frequency = np.diff(self.term_offsets)
+        self.idf = np.log(1 + (n_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    @staticmethod
+    def path_for(output: str):
+        return f"{output}.search.pkl"
+
+    @classmethod
+    def load_or_build(cls, path: str, fingerprint, titles):
+        try:
+            with open(path, "rb") as f:
+                saved_fingerprint, index = pickle.load(f)
+            if saved_fingerprint == fingerprint:
+                return index
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError, AttributeError):
+            pass
+        index = cls(titles)
+        try:
+            with open(path, "wb") as f:
+                pickle.dump((fingerprint, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"Warning: could not save search index to {path}: {e}")
+        return index
+
+    def _term_id(self, term: str):
+        i = bisect.bisect_left(self.vocabulary, term)
+        return i if i < len(self.vocabulary) and self.vocabulary[i] == term else None
+
+    def _term_scores(self, term_id: int):
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        docs = self.posting_docs[start:end]
+        tf = self.posting_frequencies[start:end]
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+        return docs, self.idf[term_id] * tf * (self.k1 + 1) / (tf + norm)
+
+    def _clause_scores(self, kind: str, value):
+        empty = np.array([], dtype=np.int64), np.array([])
+        if kind == "prefix":
+            lo = bisect.bisect_left(self.vocabulary, value)
+            hi = bisect.bisect_left(self.vocabulary, value + "\U0010ffff")
+            if lo == hi:
+                return empty
+            parts = [self._term_scores(t) for t in range(lo, hi)]
+            docs, inverse = np.unique(np.concatenate([d for d, _ in parts]), return_inverse=True)
+            return docs, np.bincount(inverse, weights=np.concatenate([s for _, s in parts]))
+        term_ids = [self._term_id(t) for t in value]
+        if not term_ids or any(t is None for t in term_ids):
+            return empty
+        parts = [self._term_scores(t) for t in term_ids]
+        docs = functools.reduce(np.intersect1d, [d for d, _ in parts])
+        if len(term_ids) > 1:
+            docs = np.array([d for d in docs if self._contains_phrase(d, term_ids)], dtype=np.int64)
+        scores = sum(s[np.searchsorted(d, docs)] for d, s in parts)
+        return docs, scores
+
+    def _contains_phrase(self, doc: int, term_ids):
+        terms = self.doc_terms[self.doc_offsets[doc]:self.doc_offsets[doc + 1]].tolist()
+        n = len(term_ids)
+        return any(terms[i:i + n] == term_ids for i in range(len(terms) - n + 1))
+
+    def search(self, query: str, limit: int):
+        clauses = []
+        for phrase, word in QUERY_REGEX.findall(query):
+            if word.endswith("*") and len(word) > 1:
+                clauses.extend(("prefix", t) for t in TOKEN_REGEX.findall(word[:-1].lower())[-1:])
+            else:
+                terms = TOKEN_REGEX.findall((phrase or word).lower())
+                if terms:
+                    clauses.append(("terms", terms))
+        if not clauses:
+            return []
+        scores = np.zeros(len(self.doc_lengths))
+        matched = np.zeros(len(self.doc_lengths), dtype=np.int64)
+        for kind, value in clauses:
+            docs, clause_scores = self._clause_scores(kind, value)
+            scores[docs] += clause_scores
+            matched[docs] += 1
+        candidates = np.flatnonzero(matched == len(clauses))
+        if len(candidates) == 0:
+            candidates = np.flatnonzero(matched)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        return candidates[np.lexsort((candidates, -scores[candidates]))].tolist()
+
+def year_window_label(years):
+    if years is None:
+        return ""
+    start, end = years
+    return f" ({start})" if start == end else f" ({start}-{end})"
+
+def show_leaderboards(index: PaperIndex, length, which='all', trends: TrendCube = None, years=None):
+    sections = [
+        ('groups', "Publishing Groups"),
+        ('schools', "Institutions"),
+        ('companies', "Companies"),
+        ('authors', "Most Frequent Authors"),
+    ]
+    results = {}
+    for category, heading in sections:
+        if which not in ['all', category]:
+            continue
+        print("\n" + "="*55 + "\n")
+        print(f"--- Top {length} {heading}{year_window_label(years)} ---")
+        if years is None:
+            names, counts = index.leaderboard(category)
+        else:
+            names, counts = trends.leaderboard(category, years)
+        results[category] = []
+        for i, (item, count) in enumerate(zip(names[:length], counts[:length]), 1):
+            print(f"{i}. {item}: {count}")
+            results[category].append({"name": str(item), "count": int(count)})
+    
+    print("\n" + "="*55 + "\n")
+    return results
+
+def show_authors_from(index: PaperIndex, institution, length, trends: TrendCube = None, years=None):
+    print(f"\n--- Top {length} Authors from {institution}{year_window_label(years)} ---")
+    affiliation_ids = index.affiliations_named(institution)
+    if len(affiliation_ids) == 0:
+        print(f"No authors found for institution matching '{institution}'.")
+        return []
+    
+    if years is None:
+        author_ids, counts = index.top_authors(length, affiliation_ids)
+    else:
+        author_ids, counts = trends.top_authors(length, affiliation_ids, years)
+    results = []
+    for i, (author_id, count) in enumerate(zip(author_ids, counts), 1):
+        print(f"{i}. {index.author_names[author_id]}: {count}")
+        results.append({"author": str(index.author_names[author_id]), "count": int(count)})
+    print("\n" + "="*55 + "\n")
+    return results
+
+def show_trending(trends: TrendCube, category: str, years, length, conference: str = None):
+    window_years, names, series, slopes = trends.trending(category, years, length, conference)
+    heading = "Authors" if category == 'authors' else category.capitalize()
+    where = f" at {conference}" if conference else ""
+    print(f"\n--- Top {length} Rising {heading}{where}, {window_years[0]}-{window_years[-1]} ---")
+    if not len(names):
+        print("Nothing grew over this window.")
+    results = []
+    for i, (name, counts, slope) in enumerate(zip(names, series, slopes), 1):
+        print(f"{i}. {name}: {' -> '.join(str(c) for c in counts)} ({slope:+.1f}/year)")
+        results.append({"name": str(name), "counts": dict(zip(window_years.tolist(), counts.tolist())), "slope": float(slope)})
+    print("\n" + "="*55 + "\n")
+    return results
+
+def show_collaborators(index: PaperIndex, graph: CoauthorGraph, name: str, length):
+    author_ids = index.author_ids_named(name)
+    if not author_ids:
+        print(f"Author '{name}' not found in the database.")
+        return []
+    collaborators, counts = graph.collaborators(author_ids)
+    print(f"\n--- Top {min(length, len(collaborators))} of {len(collaborators)} Collaborators of {name} ---")
+    results = []
+    for i, (author_id, count) in enumerate(zip(collaborators[:length], counts[:length]), 1):
+        affiliation = index.modal_affiliation([author_id])
+        print(f"{i}. {index.author_names[author_id]} ({affiliation or 'unknown affiliation'}): {count} joint papers")
+        results.append({"author": str(index.author_names[author_id]), "affiliation": affiliation, "joint_papers": int(count)})
+    print("\n" + "="*55 + "\n")
+    return results
+
+def show_hubs(index: PaperIndex, graph: CoauthorGraph, institution, length):
+    # Most central authors by co-authorship PageRank, overall or within an institution.
+    if institution:
+        affiliation_ids = index.affiliations_named(institution)
+        if len(affiliation_ids) == 0:
+            print(f"No authors found for institution matching '{institution}'.")
+            return []
+        author_ids = np.unique(index.pair_authors[index._pairs_of_affiliations(affiliation_ids)])
+        print(f"\n--- Top {length} Hubs from {institution} ---")
+    else:
+        author_ids = None
+        print(f"\n--- Top {length} Hubs ---")
+    pagerank, centrality = graph.pagerank(), graph.degree_centrality()
+    results = []
+    for i, author_id in enumerate(graph.rank(author_ids, length), 1):
+        print(
+            f"{i}. {index.author_names[author_id]}: PageRank {pagerank[author_id] * graph.n_authors:.1f}x average, "
+            f"{graph.degree[author_id]} co-authors (degree centrality {centrality[author_id]:.2e})"
+        )
+        results.append({
+            "author": str(index.author_names[author_id]),
+            "pagerank": float(pagerank[author_id]),
+            "co_authors": int(graph.degree[author_id]),
+            "degree_centrality": float(centrality[author_id]),
+        })
+    print("\n" + "="*55 + "\n")
+    return results
+
+def show_neighborhood(index: PaperIndex, graph: CoauthorGraph, name: str, hops: int, length):
+    author_ids = index.author_ids_named(name)
+    if not author_ids:
+        print(f"Author '{name}' not found in the database.")
+        return None
+    distance = graph.neighborhood(author_ids, hops)
+    print(f"\n--- {hops}-hop Co-author Neighborhood of {name} ---")
+    results = {"authors_within": {}, "central": []}
+    for hop in range(1, hops + 1):
+        print(f"  {hop} hop{'s' if hop > 1 else ''}: {int((distance == hop).sum())} authors")
+        results["authors_within"][hop] = int((distance == hop).sum())
+    reached = np.flatnonzero(distance > 0)
+    if len(reached):
+        print("Most central of them:")
+        for i, author_id in enumerate(graph.rank(reached, length), 1):
+            print(f"{i}. {index.author_names[author_id]} ({distance[author_id]} hop{'s' if distance[author_id] > 1 else ''})")
+            results["central"].append({"author": str(index.author_names[author_id]), "hops": int(distance[author_id])})
+    print("\n" + "="*55 + "\n")
+    return results
+
+ANALYZE_COMMANDS = {'/top', '/from', '/findcontact', '/findpaper', '/getcontacts', '/collaborators', '/hubs', '/neighborhood', '/trending', '/show', '/help', '/exit', '/clear'}
+
+class AnalyzeSession:
+    # The loaded dataset and everything derived from it, shared by the interactive
+    # shell and by every client of analyze --serve. The search index, co-author
+    # graph and trend cube are built on the first command that needs them.
+    def __init__(self, args, interactive: bool = True):
+        self.args = args
+        self.interactive = interactive
+        self.file_path = args.output
+        store = open_paper_store(self.file_path)
+        with stage_timer("load", step="read"):
+            self.df = store.read()
+            self.fingerprint = store.fingerprint()
+        self.entities = None
+        if not args.raw_names:
+            with stage_timer("load", step="entities"):
+                self.entities = EntityIndex.load_or_build(EntityIndex.path_for(self.file_path), self.fingerprint, self.df)
+        with stage_timer("load", step="index"):
+            self.index = PaperIndex(self.df, self.entities)
+        self.leaderboard_length = 10
+        self._contact_store = None
+        self._search_index = None
+        self._graph = None
+        self._trends = None
+
+    def contact_store(self):
+        # Opened by the first contact command; contacts.py pulls in aiohttp.
+        if self._contact_store is None:
+            from contacts import ContactStore
+            self._contact_store = ContactStore(self.args.contact_db)
+        return self._contact_store
+
+    def search_index(self):
+        if self._search_index is None:
+            self._search_index = TitleSearchIndex.load_or_build(
+                TitleSearchIndex.path_for(self.file_path), self.fingerprint, self.index.paper_titles()
+            )
+        return self._search_index
+
+    def graph(self):
+        if self._graph is None:
+            self._graph = CoauthorGraph(self.index)
+            print(f"Co-author graph: {self._graph.summary()}")
+        return self._graph
+
+    def trends(self):
+        if self._trends is None:
+            self._trends = TrendCube(self.index)
+        return self._trends
+
+    def close(self):
+        if self._contact_store is not None:
+            self._contact_store.close()
+
+async def run_analyze_command(session: AnalyzeSession, command: str):
+    # Runs one analyze command, printing its output as the shell always has, and
+    # returns its results as plain data (for analyze --serve), or None.
+    index, df, args = session.index, session.df, session.args
+    if not command.startswith('/'):
+        print("Commands must start with '/'. Type /help for a list of commands.")
+        return None
+    parts = command.split(maxsplit=1)
+    cmd = parts[0]
+    arg = parts[1] if len(parts) > 1 else ""
+    result = None
+    trends = None
+
+    if cmd == '/top':
+        top_parts = arg.split()
+        if not top_parts:
+            print("Usage: /top <number> [groups|schools|authors|companies] [year or start-end]")
+            return None
+        try:
+            years = parse_year_window(top_parts[-1]) if len(top_parts) > 1 else None
+            if years is not None:
+                top_parts = top_parts[:-1]
+                trends = session.trends()
+            session.leaderboard_length = int(top_parts[0])
+            print(f"Leaderboard length set to {session.leaderboard_length}.")
+            category = 'all'
+            if len(top_parts) > 1:
+                category_arg = top_parts[1].lower()
+                if category_arg in ['groups', 'schools', 'authors', 'companies']:
+                    category = category_arg
+                else:
+                    print(f"Unknown category: {category_arg}. Showing all leaderboards.")
+            result = show_leaderboards(index, session.leaderboard_length, which=category, trends=trends, years=years)
+        except ValueError:
+            print("Invalid number for /top command. Please use an integer.")
+    elif cmd == '/from':
+        if not arg:
+            print("Please specify an institution for the /from command.")
+            return None
+        years_match = re.search(r'\s(\d{4}(?:-\d{4})?)\s*$', arg)
+        years = parse_year_window(years_match.group(1)) if years_match else None
+        if years is not None:
+            arg = arg[:years_match.start()].strip()
+            trends = session.trends()
+        institution = arg.strip('"\'')
+        result = show_authors_from(index, institution, session.leaderboard_length, trends, years)
+    elif cmd == '/findcontact':
+        if not arg:
+            print("Please specify an author\'s full name or email in quotes.")
+            print("Usage: /findcontact \"First Last\" or /findcontact \"user@example.com\"")
+            return None
+
+        search_term = arg.strip('"\'')
+
+        if '@' in search_term:
+            email_to_find = search_term.lower()
+            try:
+                contact_info = session.contact_store().find_by_email(email_to_find)
+                source = args.contact_db
+                if contact_info is None:
+                    contacts_df = open_store("contacts.csv").read()
+                    contact_row = contacts_df[contacts_df['Email'].str.lower() == email_to_find]
+
+                    if contact_row.empty:
+                        print(f"Email '{email_to_find}' not found in {args.contact_db} or contacts.csv.")
+                        return None
+
+                    contact_info = contact_row.iloc[0].to_dict()
+                    source = "contacts.csv"
+                author_name = contact_info['Author']
+
+                print(f"\n--- Contact Information (from {source}) ---")
+                print(f"  Name: {contact_info.get('Author', 'N/A')}")
+                print(f"  Affiliation: {contact_info.get('Affiliation', 'N/A')}")
+                print(f"  Website: {contact_info.get('Website', 'N/A')}")
+                print(f"  LinkedIn: {contact_info.get('LinkedIn', 'N/A')}")
+                print(f"  Google Scholar: {contact_info.get('Google Scholar', 'N/A')}")
+                print(f"  Email: {contact_info.get('Email', 'N/A')}")
+
+            except FileNotFoundError:
+                print(f"Email '{email_to_find}' not found in {args.contact_db} and contacts.csv does not exist.")
+                print("Please run /getcontacts first.")
+                return None
+        else:
+            author_name = search_term
+            author_ids = index.author_ids_named(author_name)
+            if not author_ids:
+                print(f"Author '{author_name}' not found in the database.")
+                return None
+
+            affiliation = index.modal_affiliation(author_ids)
+
+            from contacts import get_contacts, make_search_provider
+            contacts = await get_contacts([(author_name, affiliation)], args.contact_concurrency, make_search_provider(args.search_provider, args.search_rate, args.contact_concurrency, args.search_record), session.contact_store())
+            contact_info = contacts[0] if contacts else None
+
+        # print("\n--- Papers by this Author ---")
+        result = {"author": str(author_name), "contact": contact_info, "papers": []}
+        author_rows = index.rows_of_authors(index.author_ids_named(str(author_name)))
+        if len(author_rows) == 0:
+            print("No papers found for this author in the database.")
+        else:
+            author_papers = df.iloc[author_rows]
+            for conference, year, title in zip(author_papers['Conference'], author_papers['Year'], author_papers['Title']):
+                print(f"  - [{year}] {title} ({conference})")
+                result["papers"].append({"conference": str(conference), "year": int(year), "title": str(title)})
+        print("\n" + "="*55 + "\n")
+
+    elif cmd == '/findpaper':
+        if not arg:
+            print("Please specify keywords to search for in paper titles.")
+            print("Usage: /findpaper <words> [\"exact phrase\"] [prefix*] [-n <count>]")
+            return None
+
+        limit = 20
+        limit_match = re.search(r'(?:^|\s)-n\s+(\d+)\s*$', arg)
+        if limit_match:
+            limit = int(limit_match.group(1))
+            arg = arg[:limit_match.start()].strip()
+
+        matching_papers = index.papers(session.search_index().search(arg, limit))
+        if matching_papers:
+            print(f"\n--- Top {len(matching_papers)} papers matching {arg} ---")
+        else:
+            # No whole-word match; fall back to the substring search (e.g. "learn" in "learning").
+            keyword = arg.strip('"\'')
+            matching_papers = index.find_papers(keyword)[:limit]
+            if not matching_papers:
+                print(f"No papers found with the keyword '{keyword}' in the title.")
+                return None
+            print(f"\n--- Papers containing '{keyword}' ---")
+
+        result = []
+        for conference, year, title, authors in matching_papers:
+            print(f"\nTitle: {title}")
+            print(f"  Conference: {conference} ({year})")
+            authors_str = ", ".join(authors)
+            print(f"  Authors: {authors_str}")
+            result.append({"conference": str(conference), "year": int(year), "title": str(title), "authors": [str(a) for a in authors]})
+
+        print("\n" + "="*55 + "\n")
+
+    elif cmd == '/getcontacts':
+
+        arg_str = arg
+        save_to_csv = '-save' in arg_str
+        send_email_flag = '--send-email' in arg_str
+        filename = "contacts.csv"
+
+        if send_email_flag and not session.interactive:
+            print("--send-email is only available in the interactive shell.")
+            return None
+        k_match = re.match(r'^\s*(\d+)', arg_str)
+        if not k_match:
+            print("Invalid format. Use: /getcontacts <k> [\"institution1\"] [\"institution2\"]... [-save [filename.csv]] [--send-email]")
+            return None
+        k = int(k_match.group(1))
+
+        institutions = re.findall(r'\"([^"]*?)\"', arg_str)
+
+        if save_to_csv:
+            filename_match = re.search(r'-save\s+([a-zA-Z0-9_]+\.csv)', arg_str)
+            if filename_match:
+                filename = filename_match.group(1)
+
+        authors_info = []
+        if institutions:
+            for institution in institutions:
+                # print(f"\n--- Getting top {k} authors from {institution} ---")
+                affiliation_ids = index.affiliations_named(institution)
+                if len(affiliation_ids) == 0:
+                    print(f"No authors found for institution matching '{institution}'.")
+                    continue
+
+                author_ids, _ = index.top_authors(k, affiliation_ids)
+                for author_id in author_ids:
+                    affiliation = index.modal_affiliation([author_id], affiliation_ids) or institution
+                    authors_info.append((index.author_names[author_id], affiliation))
+        else:
+            author_ids, _ = index.top_authors(k)
+            for author_id in author_ids:
+                affiliation = index.modal_affiliation([author_id])
+                authors_info.append((index.author_names[author_id], affiliation))
+
+        if not authors_info:
+            print("No authors found matching the criteria.")
+            return None
+
+        from contacts import get_contacts, make_search_provider, merge_contacts_file
+        contacts_list = await get_contacts(authors_info, args.contact_concurrency, make_search_provider(args.search_provider, args.search_rate, args.contact_concurrency, args.search_record), session.contact_store())
+
+        if send_email_flag and contacts_list:
+            print("--- Preparing to Send Emails ---")
+            from outreach import AttachmentSet, OutreachTemplate, run_outreach
+            attachments = AttachmentSet(use_mmap=args.mmap_attachments)
+            try:
+                template = OutreachTemplate.load(args.email_template, attachments)
+            except FileNotFoundError:
+                attachments.close()
+                print(f"Error: Email template file '{args.email_template}' not found. Cannot send emails.")
+                return None
+
+            await run_outreach(args, contacts_list, df, template)
+
+        if save_to_csv and contacts_list:
+            total = merge_contacts_file(filename, contacts_list)
+            print(f"Contact information merged into {filename} ({total} contacts)")
+        result = contacts_list
+
+
+    elif cmd == '/show':
+        show_parts = arg.split()
+        years = parse_year_window(show_parts[-1]) if show_parts else None
+        if years is not None:
+            show_parts = show_parts[:-1]
+            trends = session.trends()
+        if show_parts and show_parts[0] in ['groups', 'schools', 'authors', 'companies']:
+            result = show_leaderboards(index, session.leaderboard_length, which=show_parts[0], trends=trends, years=years)
+        else:
+            result = show_leaderboards(index, session.leaderboard_length, trends=trends, years=years)
+    elif cmd == '/trending':
+        length = session.leaderboard_length
+        length_match = re.search(r'(?:^|\s)-n\s+(\d+)\s*$', arg)
+        if length_match:
+            length = int(length_match.group(1))
+            arg = arg[:length_match.start()].strip()
+        trend_parts = arg.split()
+        if not trend_parts or trend_parts[0].lower() not in ['authors', 'groups', 'schools', 'companies']:
+            print("Usage: /trending <authors|groups|schools|companies> [start-end] [conference] [-n <count>]")
+            return None
+        trends = session.trends()
+        category = trend_parts[0].lower()
+        years, conference = None, None
+        for part in trend_parts[1:]:
+            if parse_year_window(part) is not None:
+                years = parse_year_window(part)
+            else:
+                conference = part
+        if years is None and len(trends.years):
+            # Default to the last three years of data.
+            years = (int(trends.years[-1]) - 2, int(trends.years[-1]))
+        try:
+            result = show_trending(trends, category, years, length, conference)
+        except ValueError as e:
+            print(e)
+    elif cmd in ('/collaborators', '/hubs', '/neighborhood'):
+        length = session.leaderboard_length
+        length_match = re.search(r'(?:^|\s)-n\s+(\d+)\s*$', arg)
+        if length_match:
+            length = int(length_match.group(1))
+            arg = arg[:length_match.start()].strip()
+        hops = 2
+        hops_match = re.search(r'(?:^|\s)(\d+)\s*$', arg) if cmd == '/neighborhood' else None
+        if hops_match:
+            hops = int(hops_match.group(1))
+            arg = arg[:hops_match.start()].strip()
+        name = arg.strip('"\'')
+        if cmd != '/hubs' and not name:
+            print(f"Usage: {cmd} \"<author name>\"{' [hops]' if cmd == '/neighborhood' else ''} [-n <count>]")
+            return None
+        graph = session.graph()
+        if cmd == '/collaborators':
+            result = show_collaborators(index, graph, name, length)
+        elif cmd == '/hubs':
+            result = show_hubs(index, graph, name, length)
+        else:
+            result = show_neighborhood(index, graph, name, hops, length)
+    elif cmd == '/help':
+        print("\nAvailable commands:")
+        print("  /show [groups|schools|authors|companies] [years] - Display all or specific top leaderboards, optionally for a year or range like 2022-2024.")
+        print("  /top <number> [category] [years] - Set leaderboard length and optionally show a specific category.")
+        print("  /from \"<institution>\" [years] - Show top authors from an institution.")
+        print("  /trending <authors|groups|schools|companies> [start-end] [conference] [-n <count>] - Show who grew fastest over a range of years.")
+        print("  /findcontact \"<name_or_email>\" - Get contact info and papers for a specific author.")
+        print("  /findpaper <words> [\"phrase\"] [prefix*] [-n <count>] - Rank papers by title relevance.")
+        print("  /getcontacts <k> [\"institution1\"] [\"institution2\"]... [-save [filename.csv]] [--send-email] - Scrape contact info and optionally save or email.")
+        print("  /collaborators \"<name>\" [-n <count>] - Show an author's co-authors by number of joint papers.")
+        print("  /hubs [\"<institution>\"] [-n <count>] - Rank authors by co-authorship PageRank, optionally within an institution.")
+        print("  /neighborhood \"<name>\" [hops] [-n <count>] - Count the authors within a number of co-author hops (default 2) and show the most central.")
+        print("  /clear                 - Clear the terminal screen.")
+        print("  /exit                  - Exit the interactive analysis tool.")
+    elif cmd in ('/exit', '/clear') and not session.interactive:
+        print(f"{cmd} is only available in the interactive shell.")
+    elif cmd == '/clear':
+        os.system('cls' if os.name == 'nt' else 'clear')
+    else:
+        print(f"Unknown command: {cmd}")
+    return result
+
+async def analyze_mode(args):
+    try:
+        session = AnalyzeSession(args, interactive=not args.serve)
+        print(f"Successfully loaded '{session.file_path}'. Found {len(session.df)} entries.")
+    except FileNotFoundError:
+        print(f"Error: The file '{args.output}' was not found.")
+        print("Please run the 'scrape' mode first to generate the data.")
+        return
+    if args.serve:
+        from analyze_server import serve_analyze
+        try:
+            await serve_analyze(session, args.server_address)
+        finally:
+            session.close()
+        return
+
+    print("Welcome to the interactive analysis tool!")
+    print("Type `/help` for a list of commands.")
+
+    while True:
+        cmd = None
+        try:
+            command = input(">> ").strip()
+            if not command:
+                continue
+            cmd = command.split(maxsplit=1)[0]
+            started = time.perf_counter()
+            if cmd == '/exit':
+                break
+            await run_analyze_command(session, command)
+        except KeyboardInterrupt:
+            print("\nExiting...")
+            break
+        except Exception as e:
+            print(f"An error occurred: {e}")
+        finally:
+            if profiling.METRICS is not None and cmd is not None and cmd.startswith('/'):
+                profiling.METRICS.observe("command", time.perf_counter() - started, command=cmd if cmd in ANALYZE_COMMANDS else "unknown")
+
+    session.close()
@@ -0,0 +1,155 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import io
+import json
+import signal
+import sys
+import time
+
+import aiohttp
+
+import profiling
+
+# Commands that wait on web searches and page fetches, possibly for minutes. They
+# run outside the server's lock so they do not hold up other clients' commands.
+NETWORK_COMMANDS = {'/findcontact', '/getcontacts'}
+COMMAND_OUTPUT = contextvars.ContextVar("command_output", default=None)
+
+class CommandOutput(io.TextIOBase):
+    # Stands in for sys.stdout while serving. Commands print as they always have,
+    # and each request's output goes to the buffer set in its own context, so
+    # commands can interleave without a process-wide redirect.
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        buffer = COMMAND_OUTPUT.get()
+        return (buffer if buffer is not None else self.stdout).write(text)
+
+    def flush(self):
+        if COMMAND_OUTPUT.get() is None:
+            self.stdout.flush()
+
+def parse_server_address(address: str):
+    # "host:port", ":port" or "unix:/path/to/socket" -> (host, port, socket path).
+    if address.startswith("unix:"):
+        return None, None, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port), None
+
+def json_default(value):
+    # numpy scalars; numpy itself is only imported by the server side.
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+async def run_captured(session: "AnalyzeSession", command: str, lock: asyncio.Lock):
+    # Each command's output is captured through COMMAND_OUTPUT, so concurrent clients
+    # never see each other's output. Other commands run one at a time under the lock,
+    # and a /top from one client does not change the leaderboard length of the next.
+    from analyze import ANALYZE_COMMANDS, run_analyze_command
+
+    cmd = command.split(maxsplit=1)[0] if command else ""
+    buffer = io.StringIO()
+    error = None
+    token = COMMAND_OUTPUT.set(buffer)
+    try:
+        async with (contextlib.nullcontext() if cmd in NETWORK_COMMANDS else lock):
+            started = time.perf_counter()
+            length = session.leaderboard_length
+            try:
+                result = await run_analyze_command(session, command)
+            except Exception as e:
+                result, error = None, str(e)
+            finally:
+                session.leaderboard_length = length
+            elapsed = time.perf_counter() - started
+    finally:
+        COMMAND_OUTPUT.reset(token)
+    if profiling.METRICS is not None and cmd.startswith('/'):
+        profiling.METRICS.observe("command", elapsed, command=cmd if cmd in ANALYZE_COMMANDS else "unknown")
+    return {"command": command, "result": result, "output": buffer.getvalue(), "error": error, "elapsed_ms": round(1000 * elapsed, 3)}
+
+async def serve_analyze(session: "AnalyzeSession", address: str):
+    # POST /query {"command": "..."} or {"commands": [...]}, GET /query?command=..., GET /health.
+    from aiohttp import web
+
+    lock = asyncio.Lock()
+    started = time.time()
+    dumps = functools.partial(json.dumps, default=json_default)
+
+    async def query(request):
+        if request.method == "GET":
+            body = {"command": request.query.get("command", "")}
+        else:
+            try:
+                body = await request.json()
+            except json.JSONDecodeError:
+                raise web.HTTPBadRequest(text="Expected a JSON body.")
+            if not isinstance(body, dict):
+                raise web.HTTPBadRequest(text='Expected a JSON object: {"command": "..."} or {"commands": [...]}.')
+            if "commands" in body and not isinstance(body["commands"], list):
+                raise web.HTTPBadRequest(text='"commands" must be a list of commands.')
+        if "commands" in body:
+            results = [await run_captured(session, str(command).strip(), lock) for command in body["commands"]]
+            return web.json_response({"results": results}, dumps=dumps)
+        return web.json_response(await run_captured(session, str(body.get("command", "")).strip(), lock), dumps=dumps)
+
+    async def health(request):
+        return web.json_response({"file": session.file_path, "rows": len(session.df), "uptime_seconds": time.time() - started})
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_route("*", "/query", query)
+    app.router.add_get("/health", health)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    host, port, socket_path = parse_server_address(address)
+    site = web.UnixSite(runner, socket_path) if socket_path else web.TCPSite(runner, host, port)
+    await site.start()
+    stdout, sys.stdout = sys.stdout, CommandOutput(sys.stdout)
+    print(f"Serving '{session.file_path}' on {address} (Ctrl+C to stop).")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    with contextlib.suppress(NotImplementedError):
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+        sys.stdout = stdout
+        print("Server stopped.")
+
+async def query_analyze_server(args):
+    # Thin client for analyze --serve: sends every --query (or, for "-", one command
+    # per line of stdin) in a single request and prints the output or, with --json,
+    # one JSON object per command.
+    commands = []
+    for query in args.query:
+        if query == "-":
+            commands.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            commands.append(query)
+    host, port, socket_path = parse_server_address(args.server_address)
+    connector = aiohttp.UnixConnector(path=socket_path) if socket_path else None
+    url = f"http://{'localhost' if socket_path else host}:{port or 80}/query"
+    try:
+        async with aiohttp.ClientSession(connector=connector) as client:
+            async with client.post(url, json={"commands": commands}) as response:
+                response.raise_for_status()
+                results = (await response.json())["results"]
+    except aiohttp.ClientConnectionError as e:
+        print(f"Error: could not reach the analysis server at {args.server_address} ({e}). Start one with 'analyze --serve'.")
+        return
+    for result in results:
+        if args.json:
+            print(json.dumps(result, default=json_default))
+        else:
+            print(result["output"], end="")
+            if result["error"]:
+                print(f"An error occurred: {result['error']}")
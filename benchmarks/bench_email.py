@@ -0,0 +1,181 @@
+"""Measure speed and precision of contact email extraction.
+
+Runs email_extraction.extract_email and the previous implementation (a full
+html.parser parse followed by string rewriting) over a corpus of faculty pages
+and reports pages/sec, precision (correct / returned) and recall (correct /
+pages that list the author's address).
+
+A corpus is a directory of saved pages plus a labels.json file:
+
+    {"page.html": {"author": "Jane Doe", "affiliation": "MIT", "email": "jdoe@mit.edu"}, ...}
+
+where "email" is null for pages that do not list the author's address. Without
+--corpus, pages are generated with the obfuscations seen on faculty sites and
+with unrelated addresses (department offices, students, co-authors) as
+distractors; --save writes that generated corpus out for reuse.
+
+    python benchmarks/bench_email.py
+    python benchmarks/bench_email.py --corpus faculty_pages/
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+import bs4
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from email_extraction import extract_email
+
+LEGACY_EMAIL_REGEX = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+def legacy_extract_email(text: str, author: str, affiliation=None):
+    soup = bs4.BeautifulSoup(text, 'html.parser')
+
+    mailto_links = soup.select('a[href^="mailto:"]')
+    if mailto_links:
+        return mailto_links[0]['href'][7:].split('?')[0]
+
+    deobfuscated_html = text.lower()
+    deobfuscated_html = deobfuscated_html.replace(' [at] ', '@').replace(' [dot] ', '.')
+    deobfuscated_html = deobfuscated_html.replace('(at)', '@').replace('(dot)', '.')
+    deobfuscated_html = deobfuscated_html.replace(' at ', '@').replace(' dot ', '.')
+    deobfuscated_html = deobfuscated_html.replace('&#64;', '@').replace('&#46;', '.')
+    deobfuscated_html = re.sub(r'\s*<span class="email">([^<]+)<\/span>\s*', r'\1', deobfuscated_html)
+
+    found_emails = LEGACY_EMAIL_REGEX.findall(deobfuscated_html)
+    if not found_emails:
+        return None
+    last_name = author.split(' ')[-1].lower()
+    preferred_emails = [e for e in found_emails if last_name in e]
+    return preferred_emails[0] if preferred_emails else found_emails[0]
+
+FIRST_NAMES = ["Maria", "Wei", "John", "Aisha", "Lukas", "Priya", "Hiroshi", "Elena", "David", "Fatima", "José", "Zoë"]
+LAST_NAMES = ["Garcia", "Zhang", "Smith", "Okafor", "Müller", "Sharma", "Tanaka", "Rossi", "Cohen", "Haddad", "Núñez", "Lefèvre"]
+AFFILIATIONS = [
+    ("Massachusetts Institute of Technology", "mit.edu"),
+    ("Stanford University", "stanford.edu"),
+    ("University of Oxford", "ox.ac.uk"),
+    ("ETH Zurich", "ethz.ch"),
+    ("Tsinghua University", "tsinghua.edu.cn"),
+    ("Carnegie Mellon University", "cmu.edu"),
+]
+
+def ascii_name(name: str):
+    import unicodedata
+    return unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+
+def cloudflare(email: str, key: int):
+    return format(key, "02x") + "".join(format(ord(c) ^ key, "02x") for c in email)
+
+def render_email(email: str, style: str, rng: random.Random):
+    local, domain = email.split("@")
+    if style == "mailto":
+        return f'<a href="mailto:{email}">{email}</a>'
+    if style == "bracket":
+        return f'{local} [at] {domain.replace(".", " [dot] ")}'
+    if style == "paren":
+        return f'{local}(at){domain.replace(".", "(dot)")}'
+    if style == "entity":
+        return f'{local}&#64;{domain.replace(".", "&#46;")}'
+    if style == "all-entities":
+        return "".join(f"&#{ord(c)};" for c in email)
+    if style == "span":
+        return f'<span class="email">{local}</span><span class="at">@</span><span>{domain}</span>'
+    if style == "cloudflare":
+        return (f'<a href="/cdn-cgi/l/email-protection" class="__cf_email__" '
+                f'data-cfemail="{cloudflare(email, rng.randrange(1, 256))}">[email&#160;protected]</a>')
+    if style == "words":
+        return f'{local.replace(".", " dot ")} at {domain.replace(".", " dot ")}'
+    return email
+
+STYLES = ["plain", "mailto", "bracket", "paren", "entity", "all-entities", "span", "cloudflare", "words"]
+
+def faculty_page(rng: random.Random, author: str, affiliation: str, domain: str, email, others):
+    nav = "".join(f'<li><a href="/people/{i}">Section {i}</a></li>' for i in range(rng.randrange(30, 120)))
+    prose = " ".join(
+        rng.choice(["Our group works on", "machine learning", "is available at the lab", "see", "systems",
+                    "robust optimization", "and", "students", "office hours at 3pm", "of", "the"])
+        for _ in range(rng.randrange(200, 800))
+    )
+    parts = [f"<h1>{author}</h1><p>Professor, {affiliation}</p>", f"<p>{prose}</p>"]
+    if email:
+        parts.insert(1, f"<p>Email: {render_email(email, rng.choice(STYLES), rng)}</p>")
+    for other in others:
+        parts.insert(rng.randrange(len(parts) + 1), f"<p>Contact: {render_email(other, rng.choice(STYLES), rng)}</p>")
+    rng.shuffle(parts)
+    return (
+        f"<!DOCTYPE html><html><head><title>{author}</title><link href='/static/style.css'></head>"
+        f"<body><nav><ul>{nav}</ul></nav><main>{''.join(parts)}</main>"
+        f"<footer><img src='/static/logo@2x.png'> &copy; {affiliation}</footer></body></html>"
+    )
+
+def generated_corpus(n_pages: int, seed: int = 0):
+    rng = random.Random(seed)
+    pages, labels = {}, {}
+    for i in range(n_pages):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        author = f"{first} {last}"
+        affiliation, domain = rng.choice(AFFILIATIONS)
+        f, l = ascii_name(first), ascii_name(last)
+        email = rng.choice([f"{f[0]}{l}@{domain}", f"{f}.{l}@{domain}", f"{l}@cs.{domain}", f"{f}@{domain}"])
+        if rng.random() < 0.15:
+            email = None
+        others = rng.sample(
+            [f"info@{domain}", f"office@cs.{domain}", f"{rng.choice(['amy', 'bob', 'kai'])}.student@{domain}", "webmaster@example.org"],
+            rng.randrange(0, 3),
+        )
+        name = f"page{i:05d}.html"
+        pages[name] = faculty_page(rng, author, affiliation, domain, email, others)
+        labels[name] = {"author": author, "affiliation": affiliation, "email": email}
+    return pages, labels
+
+def saved_corpus(directory: str):
+    with open(os.path.join(directory, "labels.json"), "r") as f:
+        labels = json.load(f)
+    pages = {}
+    for name in labels:
+        with open(os.path.join(directory, name), "rb") as f:
+            pages[name] = f.read().decode("utf-8", errors="replace")
+    return pages, labels
+
+def evaluate(extract, pages, labels):
+    start = time.perf_counter()
+    found = {name: extract(text, labels[name]["author"], labels[name]["affiliation"]) for name, text in pages.items()}
+    elapsed = time.perf_counter() - start
+    returned = [name for name, email in found.items() if email]
+    correct = [name for name in returned if found[name].lower() == (labels[name]["email"] or "").lower()]
+    listed = [name for name in labels if labels[name]["email"]]
+    return {
+        "pages/sec": len(pages) / elapsed,
+        "precision": len(correct) / len(returned) if returned else 0.0,
+        "recall": len(correct) / len(listed) if listed else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of saved faculty pages with a labels.json file.")
+    parser.add_argument("--pages", type=int, default=1000, help="Number of generated pages. [Default: 1000]")
+    parser.add_argument("--save", help="Write the generated corpus to this directory.")
+    args = parser.parse_args()
+
+    pages, labels = saved_corpus(args.corpus) if args.corpus else generated_corpus(args.pages)
+    if args.save and not args.corpus:
+        os.makedirs(args.save, exist_ok=True)
+        for name, text in pages.items():
+            with open(os.path.join(args.save, name), "w") as f:
+                f.write(text)
+        with open(os.path.join(args.save, "labels.json"), "w") as f:
+            json.dump(labels, f, indent=1, ensure_ascii=False)
+
+    print(f"{len(pages)} pages, {sum(1 for label in labels.values() if label['email'])} list the author's address")
+    for name, extract in [("legacy", legacy_extract_email), ("compiled", extract_email)]:
+        result = evaluate(extract, pages, labels)
+        print(f"{name:>8}: {result['pages/sec']:9.1f} pages/sec  precision {result['precision']:.3f}  recall {result['recall']:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Measure page extraction throughput of the scraper's parsers.
+
+Runs extract_paper_ids / extract_paper / extract_author over a set of saved
+pages with both parsers, inline and through a process pool, and reports
+pages/sec. Pages come from --pages (e.g. the objects/ directory of a scrape
+cache) or, without it, from generated pages shaped like the conference sites.
+
+    python benchmarks/bench_parse.py
+    python benchmarks/bench_parse.py --pages .scrape_cache/objects --workers 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import scrape
+
+PAGE_CHROME = "".join(
+    f'<li class="nav-item"><a class="nav-link" href="/Conferences/2024/Page{i}">Section {i}</a></li>'
+    for i in range(200)
+)
+
+def page(body: str) -> str:
+    return (
+        "<!DOCTYPE html><html><head><title>Schedule</title>"
+        + "".join(f'<script src="/static/js/lib{i}.js"></script>' for i in range(20))
+        + f'</head><body><nav><ul>{PAGE_CHROME}</ul></nav><main><div class="container">{body}</div></main></body></html>'
+    )
+
+def generated_pages(n_papers: int):
+    schedule = page("".join(
+        f'<div class="maincard poster Poster" id="maincard_{i}"><div class="maincardType">Poster</div>'
+        f'<div class="maincardBody">Paper {i}</div><div class="maincardFooter">Author A · Author B</div></div>'
+        for i in range(n_papers)
+    ))
+    papers = [
+        page(
+            f'<div><div class="maincard Poster"><div class="maincardBody">A Study of Topic {i}</div>'
+            + "".join(
+                f"<button class=\"btn\" onclick=\"showSpeaker('{i * 10 + k}-{k}');\">Author {i * 10 + k}</button>"
+                for k in range(5)
+            )
+            + '<div class="abstractContainer">' + "Lorem ipsum dolor sit amet. " * 40 + "</div></div></div>"
+        )
+        for i in range(n_papers)
+    ]
+    speakers = [
+        page(f'<div><div class="maincard"></div><h3>Author {i}</h3><h4>University {i % 50}</h4><p>Bio</p></div>')
+        for i in range(n_papers)
+    ]
+    return {"schedule": [schedule], "paper": papers, "speaker": speakers}
+
+def saved_pages(directory: str):
+    pages = {"schedule": [], "paper": [], "speaker": []}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            text = f.read().decode("utf-8", errors="replace")
+        if "maincard poster" in text or 'id="maincard_' in text:
+            pages["schedule"].append(text)
+        elif "showSpeaker(" in text:
+            pages["paper"].append(text)
+        elif "<h4" in text:
+            pages["speaker"].append(text)
+    return pages
+
+EXTRACTORS = {
+    "schedule": scrape.extract_paper_ids,
+    "paper": scrape.extract_paper,
+    "speaker": scrape.extract_author,
+}
+
+def check_parity(pages):
+    mismatches = 0
+    for kind, texts in pages.items():
+        for text in texts:
+            if EXTRACTORS[kind](text, "bs4") != EXTRACTORS[kind](text, "lxml"):
+                mismatches += 1
+    return mismatches
+
+def run_inline(pages, parser: str):
+    for kind, texts in pages.items():
+        for text in texts:
+            EXTRACTORS[kind](text, parser)
+
+async def run_pool(pages, parser: str, pool: ProcessPoolExecutor):
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(pool, EXTRACTORS[kind], text, parser)
+        for kind, texts in pages.items()
+        for text in texts
+    ))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Directory of saved pages, e.g. .scrape_cache/objects.")
+    parser.add_argument("--papers", type=int, default=500, help="Number of generated paper/speaker pages. [Default: 500]")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Process pool size. [Default: CPU count]")
+    args = parser.parse_args()
+
+    pages = saved_pages(args.pages) if args.pages else generated_pages(args.papers)
+    n_pages = sum(len(texts) for texts in pages.values())
+    print(f"{n_pages} pages ({', '.join(f'{len(v)} {k}' for k, v in pages.items())})")
+    print(f"lxml/bs4 extraction mismatches: {check_parity(pages)}")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # Warm the workers up so process start-up is not part of the measurement.
+        asyncio.run(run_pool({"speaker": pages["speaker"][:args.workers]}, "lxml", pool))
+        for parser_name in ["bs4", "lxml"]:
+            start = time.perf_counter()
+            run_inline(pages, parser_name)
+            inline = time.perf_counter() - start
+
+            start = time.perf_counter()
+            asyncio.run(run_pool(pages, parser_name, pool))
+            pooled = time.perf_counter() - start
+
+            print(f"{parser_name:>5} inline:          {n_pages / inline:10.1f} pages/sec")
+            print(f"{parser_name:>5} pool ({args.workers:>2} procs): {n_pages / pooled:10.1f} pages/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Benchmark scrape mode end to end against a local replay of the conference sites.
+
+A fixture archive is a zip of recorded pages: index.json maps each page URL
+(without its scheme) to an object name, and objects/<name> holds the page.
+Fixtures come from one of:
+
+    record    scrape the live sites once into a fresh cache and pack the pages
+    pack      pack the pages of an existing scrape cache (--cache-dir)
+    generate  synthesize pages shaped like the conference sites
+
+`replay` serves a fixture from a local aiohttp server, with optional latency
+and error injection, and runs `research.py scrape` against it in a child
+process. It reports requests/sec, time spent parsing, end-to-end wall time and
+peak RSS. Arguments after `--` are passed on to scrape mode.
+
+    python benchmarks/bench_scrape.py generate fixture.zip --papers 300 --years 2023-2024
+    python benchmarks/bench_scrape.py replay fixture.zip --latency 0.02 --error-rate 0.01 -- --parallel 100
+    python benchmarks/bench_scrape.py record live.zip --years 2024 --conferences ICLR
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+
+from aiohttp import web
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+
+import profiling
+import research
+import scrape
+from bench_parse import page
+from storage import open_paper_store
+
+RESULT_PREFIX = "BENCH_RESULT "
+SCHEDULE_REGEX = re.compile(r"^([^/]+)/Conferences/(\d+)/Schedule$")
+
+def url_key(url: str):
+    return url.split("://", 1)[-1]
+
+def write_fixture(path: str, pages):
+    # pages: iterable of (url, bytes). Identical pages are stored once.
+    index = {}
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        written = set()
+        for url, body in pages:
+            digest = hashlib.sha256(body).hexdigest()
+            if digest not in written:
+                archive.writestr(f"objects/{digest}", body)
+                written.add(digest)
+            index[url_key(url)] = digest
+        archive.writestr("index.json", json.dumps(index, indent=1))
+    return len(index)
+
+def read_fixture(path: str):
+    with zipfile.ZipFile(path) as archive:
+        index = json.loads(archive.read("index.json"))
+        objects = {digest: archive.read(f"objects/{digest}") for digest in set(index.values())}
+    return {key: (digest, objects[digest]) for key, digest in index.items()}
+
+def fixture_work(pages):
+    # (host, year) pairs whose schedule page is in the fixture.
+    work = set()
+    for key in pages:
+        match = SCHEDULE_REGEX.match(key)
+        if match:
+            work.add((match[1], int(match[2])))
+    return sorted(work)
+
+def cache_pages(cache_dir: str):
+    with open(os.path.join(cache_dir, "index.json"), "r") as f:
+        entries = json.load(f)
+    for url, entry in entries.items():
+        path = os.path.join(cache_dir, "objects", entry["digest"])
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                yield url, f.read()
+
+def generated_pages(conferences, years, n_papers: int, authors_per_paper: int = 5, seed: int = 0):
+    rng = random.Random(seed)
+    affiliations = [f"University {i}" for i in range(60)] + ["Google", "Meta AI", "Microsoft Research"]
+    for conf in conferences:
+        for year in years:
+            ids = [str(1000 + i) for i in range(n_papers)]
+            yield conf.papers_url(year), page("".join(
+                f'<div class="maincard poster Poster" id="maincard_{id}"><div class="maincardBody">Paper {id}</div></div>'
+                for id in ids
+            )).encode()
+            speakers = set()
+            for id in ids:
+                authors = [str(rng.randrange(n_papers * 3)) for _ in range(authors_per_paper)]
+                speakers.update(f"{a}-{k}" for k, a in enumerate(authors))
+                yield conf.paper_url(year, id), page(
+                    f'<div><div class="maincard Poster"><div class="maincardBody">{conf.name} {year} paper {id}</div>'
+                    + "".join(
+                        f"<button class=\"btn\" onclick=\"showSpeaker('{a}-{k}');\">Author {a}</button>"
+                        for k, a in enumerate(authors)
+                    )
+                    + '<div class="abstractContainer">' + "Lorem ipsum dolor sit amet. " * 40 + "</div></div></div>"
+                ).encode()
+            for speaker in sorted(speakers):
+                author = int(speaker.split("-")[0])
+                yield conf.author_url(year, speaker), page(
+                    f'<div><div class="maincard"></div><h3>Author {author}</h3>'
+                    f'<h4>{affiliations[author % len(affiliations)]}</h4><p>Bio</p></div>'
+                ).encode()
+
+def make_app(pages, latency: float, jitter: float, error_rate: float, error_status: int, stats):
+    async def handler(request):
+        delay = latency + random.uniform(0, jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        stats["requests"] += 1
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            return web.Response(status=error_status, headers={"Retry-After": "0"})
+        key = request.path_qs.lstrip("/")
+        found = pages.get(key)
+        if found is None:
+            stats["missing"] += 1
+            return web.Response(status=404)
+        digest, body = found
+        etag = f'"{digest[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, content_type="text/html", charset="utf-8", headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    return app
+
+async def run_child(work, base: str, scrape_args):
+    spec = json.dumps({"work": work, "base": base})
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.abspath(__file__), "_child", spec, *scrape_args,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+    )
+    output, _ = await process.communicate()
+    result = None
+    for line in output.decode(errors="replace").splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+    if result is None:
+        raise SystemExit(f"scrape run failed:\n{output.decode(errors='replace')[-2000:]}")
+    return result
+
+def scrape_argv(years, output: str, cache_dir: str, extra):
+    return ["--years", f"{min(years)}-{max(years)}", "-o", output, "--cache-dir", cache_dir, *extra]
+
+async def replay(args):
+    pages = read_fixture(args.fixture)
+    work = fixture_work(pages)
+    if not work:
+        raise SystemExit(f"{args.fixture} contains no schedule pages")
+    stats = {"requests": 0, "errors": 0, "missing": 0, "not_modified": 0}
+    runner = web.AppRunner(make_app(pages, args.latency, args.jitter, args.error_rate, args.error_status, stats))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    print(f"Replaying {len(pages)} pages of {', '.join(f'{host} {year}' for host, year in work)} on port {port}")
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            cache_dir = os.path.join(scratch, "cache") if args.cache == "warm" else ""
+            for run in range(args.runs):
+                for key in stats:
+                    stats[key] = 0
+                output = os.path.join(scratch, f"run{run}.csv")
+                if args.cache == "cold":
+                    cache_dir = os.path.join(scratch, f"cache{run}")
+                argv = scrape_argv([year for _, year in work], output, cache_dir, args.scrape_args)
+                result = await run_child(work, f"http://127.0.0.1:{port}", argv)
+                result.update(stats)
+                result["requests_per_sec"] = stats["requests"] / result["wall_time"]
+                results.append(result)
+                print(
+                    f"run {run + 1}: {result['wall_time']:7.2f}s wall, {stats['requests']} requests "
+                    f"({result['requests_per_sec']:.0f}/s, {stats['errors']} injected errors, {stats['not_modified']} not modified), "
+                    f"parse {result['parse_time']:.2f}s over {result['pages_parsed']} pages, "
+                    f"peak RSS {result['peak_rss_mb']:.0f} MB, {result['rows']} rows"
+                )
+    finally:
+        await runner.cleanup()
+
+    summary = {
+        key: statistics.median(r[key] for r in results)
+        for key in ["wall_time", "requests", "requests_per_sec", "parse_time", "pages_parsed", "peak_rss_mb", "rows"]
+    }
+    if args.runs > 1:
+        print(
+            f"median: {summary['wall_time']:.2f}s wall, {summary['requests_per_sec']:.0f} requests/s, "
+            f"parse {summary['parse_time']:.2f}s, peak RSS {summary['peak_rss_mb']:.0f} MB"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"runs": results, "median": summary}, f, indent=1)
+
+def child(spec: str, scrape_args):
+    # Runs inside the child process: scrape mode pointed at the replay server (or
+    # the live sites when no base is given), with parse time taken from profiling.METRICS.
+    spec = json.loads(spec)
+    work = {(host, year) for host, year in spec["work"]}
+    scrape.CONFERENCES[:] = [conf for conf in scrape.CONFERENCES if any(conf.host == host for host, _ in work)]
+    if spec["base"]:
+        for conf in scrape.CONFERENCES:
+            conf.base_url = f"{spec['base']}/{conf.host}"
+
+    profiling.METRICS = profiling.Metrics()
+    sys.argv = ["research.py", "scrape", *scrape_args]
+    start = time.perf_counter()
+    asyncio.run(research.main())
+    wall_time = time.perf_counter() - start
+    parsed = profiling.METRICS.grouped("parse").get(None)
+    extracted = profiling.METRICS.grouped("extract").get(None)
+
+    output = scrape_args[scrape_args.index("-o") + 1]
+    store = open_paper_store(output)
+    rows = len(store.read()) if store.exists() else 0
+    # ru_maxrss is in KiB on Linux; parse pool workers count as children.
+    peak_kib = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(RESULT_PREFIX + json.dumps({
+        "wall_time": wall_time,
+        "parse_time": (parsed.sum + extracted.sum) if parsed else 0.0,
+        "pages_parsed": parsed.count if parsed else 0,
+        "peak_rss_mb": peak_kib / 1024,
+        "rows": rows,
+    }), flush=True)
+
+async def record(args):
+    with tempfile.TemporaryDirectory() as scratch:
+        cache_dir = os.path.join(scratch, "cache")
+        conferences = [c for c in scrape.CONFERENCES if not args.conferences or c.name in args.conferences]
+        start, _, end = args.years.partition("-")
+        years = range(int(start), int(end or start) + 1)
+        work = [(c.host, year) for c in conferences for year in years if year >= c.first_year]
+        argv = scrape_argv(list(years), os.path.join(scratch, "papers.csv"), cache_dir, args.scrape_args)
+        result = await run_child(work, "", argv)
+        n_pages = write_fixture(args.fixture, cache_pages(cache_dir))
+    print(f"Recorded {n_pages} pages ({result['rows']} rows) into {args.fixture}")
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "_child":
+        child(sys.argv[2], sys.argv[3:])
+        return
+
+    argv, scrape_args = sys.argv[1:], []
+    if "--" in argv:
+        argv, scrape_args = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Scrape the live sites once into a fixture.")
+    record_parser.add_argument("fixture")
+    record_parser.add_argument("--years", required=True, help="Year or range, e.g. 2023-2024.")
+    record_parser.add_argument("--conferences", nargs="*", help="Conference names, e.g. ICML ICLR. [Default: all]")
+
+    pack_parser = commands.add_parser("pack", help="Pack the pages of a scrape cache into a fixture.")
+    pack_parser.add_argument("fixture")
+    pack_parser.add_argument("--cache-dir", default=".scrape_cache", help="[Default: .scrape_cache]")
+
+    generate_parser = commands.add_parser("generate", help="Write a fixture of synthetic pages.")
+    generate_parser.add_argument("fixture")
+    generate_parser.add_argument("--years", default="2024", help="Year or range. [Default: 2024]")
+    generate_parser.add_argument("--papers", type=int, default=200, help="Papers per conference and year. [Default: 200]")
+    generate_parser.add_argument("--conferences", nargs="*", help="Conference names. [Default: all]")
+
+    replay_parser = commands.add_parser("replay", help="Benchmark scrape mode against a fixture.")
+    replay_parser.add_argument("fixture")
+    replay_parser.add_argument("--latency", type=float, default=0, help="Seconds added to every response. [Default: 0]")
+    replay_parser.add_argument("--jitter", type=float, default=0, help="Extra random delay of up to this many seconds. [Default: 0]")
+    replay_parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with --error-status. [Default: 0]")
+    replay_parser.add_argument("--error-status", type=int, default=503, help="[Default: 503]")
+    replay_parser.add_argument("--cache", choices=["none", "cold", "warm"], default="none",
+                               help="Scrape without the response cache, with an empty one per run, or with one shared across runs. [Default: none]")
+    replay_parser.add_argument("--runs", type=int, default=1, help="[Default: 1]")
+    replay_parser.add_argument("--json", help="Write per-run results and medians to this file.")
+    args = parser.parse_args(argv)
+    args.scrape_args = scrape_args
+
+    if args.command == "record":
+        asyncio.run(record(args))
+    elif args.command == "pack":
+        n_pages = write_fixture(args.fixture, cache_pages(args.cache_dir))
+        print(f"Packed {n_pages} pages from {args.cache_dir} into {args.fixture}")
+    elif args.command == "generate":
+        conferences = [c for c in scrape.CONFERENCES if not args.conferences or c.name in args.conferences]
+        start, _, end = args.years.partition("-")
+        years = range(int(start), int(end or start) + 1)
+        n_pages = write_fixture(args.fixture, generated_pages(conferences, years, args.papers))
+        print(f"Generated {n_pages} pages into {args.fixture}")
+    else:
+        asyncio.run(replay(args))
+
+if __name__ == "__main__":
+    main()
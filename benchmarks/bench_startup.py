@@ -0,0 +1,168 @@
+"""Measure the import cost of each research.py entry point.
+
+Every mode lives in its own module and is imported only when it runs (see
+research.MODES). This runs `python -X importtime` in a fresh interpreter for
+each mode, importing research and then the mode's module exactly as main()
+does, and reports the import time of the whole entry point (interpreter
+startup excluded) with the packages that account for most of it. "help" is
+research.py alone, which is all `--help` and argument errors pay for; the
+wall time of `python research.py --help` is reported alongside.
+
+Every run also checks IMPORT_BUDGETS, the packages a mode must not import at
+startup, and exits with status 1 when one does. Timings depend on the machine,
+so no timing baseline is committed: --json records one locally, and --check
+compares a later run against it, exiting with status 1 when a mode got slower
+by more than --tolerance (a fraction) plus --slack milliseconds and listing the
+packages that grew.
+
+    python benchmarks/bench_startup.py --runs 7 --json startup.json
+    python benchmarks/bench_startup.py --check startup.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, ROOT)
+
+import research
+
+# Packages each entry point must not import before it runs; see "Code Layout and Startup Time" in the README.
+IMPORT_BUDGETS = {
+    "help": {"pandas", "numpy", "pyarrow", "lxml", "aiohttp"},
+    "query": {"pandas", "numpy", "pyarrow", "lxml"},
+    "analyze": {"aiohttp", "contacts", "lxml"},
+    "outreach": {"aiohttp", "contacts", "lxml"},
+    "convert": {"aiohttp", "lxml"},
+}
+
+IMPORTTIME_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def importtime(code: str):
+    # [(name, self_us, cumulative_us, depth)] in the order imports finished.
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if process.returncode:
+        raise SystemExit(f"{code!r} failed:\n{process.stderr[-2000:]}")
+    entries = []
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_REGEX.match(line)
+        if match:
+            entries.append((match[4], int(match[1]), int(match[2]), len(match[3]) // 2))
+    return entries
+
+def mode_code(mode: str):
+    if mode == "help":
+        return "import research"
+    return f"import research; research.load_mode({mode!r})"
+
+def measure(mode: str, startup_modules):
+    # Top-level imports that interpreter startup already did (site, encodings) are left out.
+    total = 0
+    packages = defaultdict(int)
+    for name, self_us, cumulative_us, depth in importtime(mode_code(mode)):
+        if name.split(".")[0] in startup_modules:
+            continue
+        if depth == 0:
+            total += cumulative_us
+        packages[name.split(".")[0]] += self_us
+    return total / 1000, {name: us / 1000 for name, us in packages.items()}
+
+def help_wall_time():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "research.py", "--help"], cwd=ROOT, capture_output=True, check=True)
+    return 1000 * (time.perf_counter() - start)
+
+def run(modes, runs: int):
+    startup_modules = {name.split(".")[0] for name, _, _, _ in importtime("pass")}
+    results = {}
+    for mode in modes:
+        totals, packages = [], defaultdict(list)
+        for _ in range(runs):
+            total, by_package = measure(mode, startup_modules)
+            totals.append(total)
+            for name, ms in by_package.items():
+                packages[name].append(ms)
+        results[mode] = {
+            "import_ms": statistics.median(totals),
+            "packages": {name: statistics.median(values + [0.0] * (runs - len(values))) for name, values in packages.items()},
+        }
+    results["help"]["wall_ms"] = statistics.median(help_wall_time() for _ in range(runs))
+    return results
+
+def report(results, top: int):
+    for mode, result in results.items():
+        line = f"{mode:<9} {result['import_ms']:8.1f} ms imports"
+        if "wall_ms" in result:
+            line += f"  ({result['wall_ms']:.0f} ms wall for research.py --help)"
+        print(line)
+        heaviest = sorted(result["packages"].items(), key=lambda item: -item[1])[:top]
+        print("          " + ", ".join(f"{name} {ms:.1f}" for name, ms in heaviest))
+
+def check_budgets(results):
+    violations = 0
+    for mode, result in results.items():
+        imported = sorted(IMPORT_BUDGETS.get(mode, set()) & set(result["packages"]))
+        if imported:
+            violations += 1
+            print(f"OVER BUDGET {mode}: imports {', '.join(imported)}")
+    return violations
+
+def check(results, baseline, tolerance: float, slack: float):
+    regressions = 0
+    for mode, result in results.items():
+        if mode not in baseline:
+            continue
+        before, after = baseline[mode]["import_ms"], result["import_ms"]
+        if after <= before * (1 + tolerance) + slack:
+            continue
+        regressions += 1
+        print(f"REGRESSION {mode}: {before:.1f} ms -> {after:.1f} ms")
+        grown = sorted(
+            ((name, ms - baseline[mode]["packages"].get(name, 0.0)) for name, ms in result["packages"].items()),
+            key=lambda item: -item[1],
+        )
+        print("  grew: " + ", ".join(f"{name} +{delta:.1f} ms" for name, delta in grown[:5] if delta > 0))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="*", choices=["help", *research.MODES], help="[Default: help and every mode]")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode; medians are reported. [Default: 5]")
+    parser.add_argument("--top", type=int, default=6, help="Packages listed per mode. [Default: 6]")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--check", help="Results file to compare against; exits with status 1 on a regression.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown for --check. [Default: 0.25]")
+    parser.add_argument("--slack", type=float, default=20, help="Allowed absolute slowdown in milliseconds for --check. [Default: 20]")
+    args = parser.parse_args()
+
+    modes = args.modes or ["help", *research.MODES]
+    if "help" not in modes:
+        modes = ["help", *modes]
+    results = run(modes, args.runs)
+    report(results, args.top)
+    failed = check_budgets(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.check:
+        with open(args.check, "r") as f:
+            baseline = json.load(f)
+        if check(results, baseline, args.tolerance, args.slack):
+            failed = True
+        else:
+            print(f"No regressions against {args.check}.")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Local stand-in for the web search used by contact lookup.
+
+Serves the JSON protocol of contacts.HttpSearchProvider from a file of
+recorded results (the format written by --search-record), plus the candidate
+pages themselves, so contact lookup can be exercised and timed without
+touching the network.
+
+    POST /search   {"queries": [[query, num_results], ...]} -> {"results": [[url, ...], ...]}
+    GET  /pages/<name>   a saved page from --pages
+
+Unknown queries return no results. --latency adds a delay to every response.
+
+    python benchmarks/search_server.py --results searches.json --pages pages/ --port 8765
+    python research.py analyze --search-provider http://127.0.0.1:8765/search
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from contacts import OfflineSearchProvider
+
+def make_app(results_path: str, pages_dir: str, latency: float):
+    provider = OfflineSearchProvider(results_path) if results_path else None
+    stats = {"queries": 0, "requests": 0}
+
+    async def search(request):
+        await asyncio.sleep(latency)
+        body = await request.json()
+        stats["requests"] += 1
+        stats["queries"] += len(body["queries"])
+        results = [
+            await provider.search(query, num_results) if provider else []
+            for query, num_results in body["queries"]
+        ]
+        return web.json_response({"results": results})
+
+    async def page(request):
+        await asyncio.sleep(latency)
+        if not pages_dir:
+            raise web.HTTPNotFound()
+        path = os.path.join(pages_dir, os.path.basename(request.match_info["name"]))
+        if not os.path.isfile(path):
+            raise web.HTTPNotFound()
+        return web.FileResponse(path, headers={"Content-Type": "text/html"})
+
+    async def report(app):
+        print(f"{stats['requests']} search requests, {stats['queries']} queries")
+
+    app = web.Application()
+    app.router.add_post("/search", search)
+    app.router.add_get("/pages/{name}", page)
+    app.on_shutdown.append(report)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", help="JSON file mapping queries to result URLs.")
+    parser.add_argument("--pages", help="Directory of pages served under /pages/.")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds of delay added to every response. [Default: 0]")
+    parser.add_argument("--port", type=int, default=8765, help="[Default: 8765]")
+    args = parser.parse_args()
+    web.run_app(make_app(args.results, args.pages, args.latency), host="127.0.0.1", port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import abc
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import pandas as pd
+
+from email_extraction import extract_email
+from entities import normalize_name
+from ratelimit import RateLimiter
+from storage import open_store
+
+CONTACT_CONCURRENCY = 4
+SEARCH_RATE = 0.5
+
+class SearchProvider(abc.ABC):
+    # Web search used for contact discovery. Providers return result URLs for a
+    # query; search_many lets batching providers answer several queries at once.
+    name = "search"
+
+    @abc.abstractmethod
+    async def search(self, query: str, num_results: int):
+        ...
+
+    async def search_many(self, queries):
+        return list(await asyncio.gather(*(self.search(query, n) for query, n in queries)))
+
+    async def close(self):
+        pass
+
+class GoogleSearchProvider(SearchProvider):
+    # googlesearch is blocking, so queries run on a thread pool behind a rate limiter.
+    name = "google"
+
+    def __init__(self, rate: float, workers: int):
+        self.rate_limiter = RateLimiter(rate)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    async def search(self, query: str, num_results: int):
+        from googlesearch import search
+
+        await self.rate_limiter.wait()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pool,
+            lambda: list(search(query, num_results=num_results, sleep_interval=1)),
+        )
+
+    async def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+class OfflineSearchProvider(SearchProvider):
+    # Answers from a JSON file mapping queries to result URLs, e.g. one written by RecordingSearchProvider.
+    name = "offline"
+
+    def __init__(self, path: str):
+        with open(path, "r") as f:
+            self.results = {self.key(query): urls for query, urls in json.load(f).items()}
+
+    @staticmethod
+    def key(query: str):
+        return " ".join(query.split())
+
+    async def search(self, query: str, num_results: int):
+        return self.results.get(self.key(query), [])[:num_results]
+
+class HttpSearchProvider(SearchProvider):
+    # Client for a search service speaking JSON over HTTP, such as benchmarks/search_server.py:
+    # POST {"queries": [[query, num_results], ...]} -> {"results": [[url, ...], ...]}.
+    name = "http"
+
+    def __init__(self, url: str, rate: float = 0):
+        self.url = url
+        self.rate_limiter = RateLimiter(rate)
+        self.session = None
+
+    async def search(self, query: str, num_results: int):
+        return (await self.search_many([(query, num_results)]))[0]
+
+    async def search_many(self, queries):
+        await self.rate_limiter.wait()
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        async with self.session.post(self.url, json={"queries": [list(q) for q in queries]}) as response:
+            response.raise_for_status()
+            return (await response.json())["results"]
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+class RecordingSearchProvider(SearchProvider):
+    # Wraps another provider and saves every answer in the OfflineSearchProvider format.
+    def __init__(self, inner: SearchProvider, path: str):
+        self.inner = inner
+        self.name = inner.name
+        self.path = path
+        try:
+            with open(path, "r") as f:
+                self.recorded = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.recorded = {}
+
+    async def search(self, query: str, num_results: int):
+        results = await self.inner.search(query, num_results)
+        self.recorded[OfflineSearchProvider.key(query)] = results
+        return results
+
+    async def search_many(self, queries):
+        results = await self.inner.search_many(queries)
+        for (query, _), urls in zip(queries, results):
+            self.recorded[OfflineSearchProvider.key(query)] = urls
+        return results
+
+    async def close(self):
+        await self.inner.close()
+        with open(self.path, "w") as f:
+            json.dump(self.recorded, f, indent=1)
+
+def make_search_provider(spec: str, rate: float, workers: int, record_path: str = None):
+    # spec is "google", a path to a recorded .json file, or the URL of an HTTP search service.
+    if spec == "google":
+        provider = GoogleSearchProvider(rate, workers)
+    elif spec.startswith("http://") or spec.startswith("https://"):
+        provider = HttpSearchProvider(spec, rate)
+    else:
+        provider = OfflineSearchProvider(spec)
+    if record_path:
+        provider = RecordingSearchProvider(provider, record_path)
+    return provider
+
+class ContactFinder:
+    # Searches go through a SearchProvider; candidate pages of an author are
+    # fetched in parallel and the first page that yields an email cancels the rest.
+    def __init__(self, session: aiohttp.ClientSession, provider: SearchProvider, fetch_timeout: float = 10):
+        self.session = session
+        self.fetch_timeout = fetch_timeout
+        self.provider = provider
+
+    @staticmethod
+    def scholar_url(results):
+        for r in results:
+            if "scholar.google.com/citations?user=" in r:
+                return r
+        return 'n/a'
+
+    # The lookups below return 'n/a' when they ran and found nothing, and None when
+    # they could not run, so that failures are not cached as negative results.
+    async def find_scholar(self, author: str, affiliation):
+        scholar_query = f'{author} {affiliation or ""} google scholar'
+        try:
+            return self.scholar_url(await self.provider.search(scholar_query, 2))
+        except Exception:
+            return None
+
+    async def fetch_email(self, url: str, author: str, affiliation):
+        # Raises when the page could not be read; a missing page is simply no email.
+        async with self.session.get(url, timeout=self.fetch_timeout) as response:
+            if response.status == 429 or response.status >= 500:
+                response.raise_for_status()
+            if response.status != 200:
+                return None
+            text = await response.text()
+        return extract_email(text, author, affiliation)
+
+    async def first_email(self, urls, author: str, affiliation):
+        tasks = [asyncio.ensure_future(self.fetch_email(url, author, affiliation)) for url in urls]
+        failed = False
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    email = await next_done
+                except Exception:
+                    failed = True
+                    continue
+                if email:
+                    return email
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None if failed else 'n/a'
+
+    async def find(self, author: str, affiliation, known=None):
+        # `known` holds fields that are still fresh in the contact store; only the
+        # searches needed for the remaining fields are run. Returns the contact and
+        # the fields whose lookup failed, which read 'n/a' but must not be cached.
+        contact = {"Author": author, "Affiliation": affiliation, **(known or {})}
+        query = f'{author} {affiliation or ""} contact email'
+        needs_scholar = "Google Scholar" not in contact
+        needs_search = not all(field in contact for field in ["Website", "LinkedIn", "Email"])
+
+        if needs_search and needs_scholar:
+            scholar_query = f'{author} {affiliation or ""} google scholar'
+            try:
+                search_results, scholar_results = await self.provider.search_many([(query, 5), (scholar_query, 2)])
+                contact["Google Scholar"] = self.scholar_url(scholar_results)
+            except Exception:
+                # A failed batch doesn't say which query failed; asking again one at a time
+                # keeps a scholar failure from costing the website and email results.
+                search_results, contact["Google Scholar"] = await asyncio.gather(
+                    self.provider.search(query, 5), self.find_scholar(author, affiliation)
+                )
+        elif needs_search:
+            search_results = await self.provider.search(query, 5)
+        else:
+            if needs_scholar:
+                contact["Google Scholar"] = await self.find_scholar(author, affiliation)
+            search_results = None
+        failed = set()
+        if needs_scholar and contact["Google Scholar"] is None:
+            contact["Google Scholar"] = 'n/a'
+            failed.add("Google Scholar")
+
+        if search_results is not None:
+            linkedin_results = [r for r in search_results if "linkedin.com/in" in r]
+            contact.setdefault("LinkedIn", linkedin_results[0] if linkedin_results else 'n/a')
+            personal_sites = [
+                url for url in search_results
+                if not any(domain in url for domain in ['linkedin.com', 'scholar.google.com', 'dblp.org', 'twitter.com'])
+            ]
+            contact.setdefault("Website", personal_sites[0] if personal_sites else 'n/a')
+            if "Email" not in contact:
+                email = await self.first_email(search_results, author, affiliation)
+                if email is None:
+                    email = 'n/a'
+                    failed.add("Email")
+                contact["Email"] = email.lower()
+        return {field: contact[field] for field in ["Author", "Affiliation", *CONTACT_FIELDS]}, failed
+
+CONTACT_FIELDS = {"Website": "website", "LinkedIn": "linkedin", "Google Scholar": "scholar", "Email": "email"}
+DAY = 60 * 60 * 24
+CONTACT_FIELD_TTLS = {"Website": 90 * DAY, "LinkedIn": 180 * DAY, "Google Scholar": 180 * DAY, "Email": 90 * DAY}
+NEGATIVE_CONTACT_TTL = 14 * DAY
+
+class ContactStore:
+    # SQLite cache of contact lookups keyed by normalized (author, affiliation).
+    # Every field carries its own fetch time; a field is reused while younger
+    # than its TTL, and "n/a" results are reused for NEGATIVE_CONTACT_TTL.
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        columns = ", ".join(f"{column} TEXT, {column}_at REAL" for column in CONTACT_FIELDS.values())
+        self.db.execute(
+            f"CREATE TABLE IF NOT EXISTS contacts (key TEXT PRIMARY KEY, author TEXT, affiliation TEXT, {columns})"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS contacts_email ON contacts (email)")
+        self.db.commit()
+
+    @staticmethod
+    def key(author, affiliation):
+        has_affiliation = affiliation is not None and not pd.isna(affiliation)
+        return f"{normalize_name(author)}|{normalize_name(affiliation) if has_affiliation else ''}"
+
+    def fresh_fields(self, author, affiliation):
+        columns = ", ".join(f"{column}, {column}_at" for column in CONTACT_FIELDS.values())
+        row = self.db.execute(
+            f"SELECT {columns} FROM contacts WHERE key = ?", (self.key(author, affiliation),)
+        ).fetchone()
+        if row is None:
+            return {}
+        now = time.time()
+        fresh = {}
+        for i, field in enumerate(CONTACT_FIELDS):
+            value, fetched_at = row[2 * i], row[2 * i + 1]
+            if value is None or fetched_at is None:
+                continue
+            ttl = NEGATIVE_CONTACT_TTL if value == 'n/a' else CONTACT_FIELD_TTLS[field]
+            if now - fetched_at < ttl:
+                fresh[field] = value
+        return fresh
+
+    def save(self, contact, fetched_fields):
+        now = time.time()
+        key = self.key(contact["Author"], contact["Affiliation"])
+        affiliation = contact["Affiliation"]
+        if affiliation is not None and pd.isna(affiliation):
+            affiliation = None
+        self.db.execute(
+            "INSERT OR IGNORE INTO contacts (key, author, affiliation) VALUES (?, ?, ?)",
+            (key, contact["Author"], affiliation),
+        )
+        for field in fetched_fields:
+            column = CONTACT_FIELDS[field]
+            self.db.execute(
+                f"UPDATE contacts SET {column} = ?, {column}_at = ? WHERE key = ?",
+                (contact[field], now, key),
+            )
+        self.db.commit()
+
+    def find_by_email(self, email: str):
+        columns = ", ".join(CONTACT_FIELDS.values())
+        row = self.db.execute(
+            f"SELECT author, affiliation, {columns} FROM contacts WHERE email = ?", (email.lower(),)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(["Author", "Affiliation", *CONTACT_FIELDS], row))
+
+    def close(self):
+        self.db.close()
+
+def merge_contacts_file(filename: str, contacts_list):
+    # New lookups replace older rows of the same author/affiliation; failed lookups never replace data.
+    new_df = pd.DataFrame(contacts_list)
+    failed = new_df["Email"] == "Error"
+    # Only empty cells are missing; the "n/a" of earlier lookups must survive the rewrite.
+    store = open_store(filename, na_values=[""])
+    frames = [new_df[~failed]]
+    if store.exists():
+        frames.append(store.read())
+    frames.append(new_df[failed])
+    merged = pd.concat(frames, ignore_index=True).drop_duplicates(subset=["Author", "Affiliation"], keep="first")
+    store.write(merged)
+    return len(merged)
+
+async def get_contacts(authors_with_affiliations, concurrency: int = CONTACT_CONCURRENCY, provider: SearchProvider = None, contact_store: ContactStore = None):
+    if provider is None:
+        provider = GoogleSearchProvider(SEARCH_RATE, concurrency)
+    async with aiohttp.ClientSession() as session:
+        finder = ContactFinder(session, provider)
+        open_authors = asyncio.Semaphore(concurrency)
+
+        async def resolve(i, author, affiliation):
+            known = contact_store.fresh_fields(author, affiliation) if contact_store is not None else {}
+            async with open_authors:
+                try:
+                    contact, failed = await finder.find(author, affiliation, known)
+                    if contact_store is not None:
+                        contact_store.save(contact, [f for f in CONTACT_FIELDS if f not in known and f not in failed])
+                except Exception as e:
+                    print(f"\n[{i + 1}] {author}\nCould not fetch contact info for {author}: {e}")
+                    return {
+                        "Author": author,
+                        "Affiliation": affiliation,
+                        "Website": "Error",
+                        "LinkedIn": "Error",
+                        "Google Scholar": "Error",
+                        "Email": "Error"
+                    }
+            print(f"\n[{i + 1}] {author}" + (" (cached)" if len(known) == len(CONTACT_FIELDS) else ""))
+            print(f"  Website: {contact['Website']}")
+            print(f"  LinkedIn: {contact['LinkedIn']}")
+            print(f"  Google Scholar: {contact['Google Scholar']}")
+            print(f"  Email: {contact['Email']}")
+            return contact
+
+        try:
+            return list(await asyncio.gather(*(
+                resolve(i, author, affiliation)
+                for i, (author, affiliation) in enumerate(authors_with_affiliations)
+            )))
+        finally:
+            await provider.close()
@@ -0,0 +1,155 @@
+import html
+import re
+import unicodedata
+
+# Everything is found in one scan of the raw page by a single compiled pattern with
+# one alternative per encoding: mailto links, Cloudflare-protected addresses and
+# plain or obfuscated addresses ("[at]", "(dot)", markup between the parts). Pages
+# using character references ("&#64;", or every character encoded) are unescaped first.
+
+TAG = r'(?:\s*<[^<>]{0,80}>\s*)*'
+WORD_AT = r'\s+at\s+'
+AT = rf'{TAG}(?:@|%40|\s*[\[({{]\s*at\s*[\])}}]\s*|{WORD_AT}){TAG}'
+DOT = rf'{TAG}(?:\.|\s*[\[({{]\s*dot\s*[\])}}]\s*|\s+dot\s+){TAG}'
+LABEL = r'[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?'
+
+EMAIL_PATTERN = re.compile(
+    r'mailto:(?P<mailto>[^"\'\s<>?]+)'
+    r'|(?:data-cfemail="|/cdn-cgi/l/email-protection\#)(?P<cf>[0-9a-f]{6,})'
+    rf'|(?<![\w.%+-])(?P<local>[a-z0-9_%+-]+(?:(?:\.|{DOT})[a-z0-9_%+-]+)*)'
+    rf'(?P<at>{AT})'
+    rf'(?P<domain>{LABEL}(?:{DOT}{LABEL})*{DOT}[a-z]{{2,24}})(?![\w-])',
+    re.IGNORECASE,
+)
+# Cheap scan for the places an address can be anchored; the full pattern is then
+# only tried in a small window around each hit. A bare " at " only counts when a
+# dotted domain follows, so ordinary prose is skipped.
+ANCHOR_PATTERN = re.compile(
+    r'mailto:|data-cfemail="|email-protection\#|@|%40|[\[({]\s*at\s*[\])}]'
+    r'|\sat\s+(?=[a-z0-9-]+(?:\.|\s+dot\s|\s*[\[({]\s*dot))',
+    re.IGNORECASE,
+)
+LOCAL_WINDOW = 100
+DOMAIN_WINDOW = 300
+PLAIN_EMAIL = re.compile(r'[a-z0-9._%+-]+@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,24}')
+WORD_AT_SEPARATOR = re.compile(WORD_AT, re.IGNORECASE)
+SEPARATOR_DOT = re.compile(DOT, re.IGNORECASE)
+
+FILE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.css', '.js')
+GENERIC_LOCAL_PARTS = {
+    'info', 'admin', 'webmaster', 'contact', 'support', 'office', 'help', 'press', 'media',
+    'noreply', 'no-reply', 'admissions', 'events', 'jobs', 'hr', 'dept', 'department', 'web',
+}
+# A candidate needs about one real signal (name in the local part, affiliation in the
+# domain) to be returned; an unrelated address on the page is worse than none.
+MIN_SCORE = 2
+AFFILIATION_STOPWORDS = {'university', 'institute', 'college', 'school', 'of', 'the', 'and', 'for', 'at', 'de', 'la', 'lab', 'labs'}
+
+def decode_cfemail(encoded: str):
+    # Cloudflare stores the address hex-encoded, XORed with the first byte.
+    data = bytes.fromhex(encoded[:len(encoded) // 2 * 2])
+    return bytes(b ^ data[0] for b in data[1:]).decode('utf-8', errors='replace')
+
+def anchored_matches(text: str):
+    scanned = 0
+    for anchor in ANCHOR_PATTERN.finditer(text):
+        position = anchor.start()
+        if position < scanned:
+            continue
+        start = max(scanned, position - LOCAL_WINDOW)
+        end = min(len(text), anchor.end() + DOMAIN_WINDOW)
+        while True:
+            match = EMAIL_PATTERN.search(text, start, end)
+            if match is None or match.start() > position:
+                break
+            if match.end() > position:
+                scanned = match.end()
+                yield match
+                break
+            start = match.end()
+
+def email_candidates(text: str):
+    # Yields (email, source, position); source is "mailto", "cloudflare", "plain",
+    # "obfuscated" or "word" (a bare " at ", which prose like "available at cs.mit.edu" also produces).
+    if '&#' in text:
+        text = html.unescape(text)
+    for match in anchored_matches(text):
+        if match.group('mailto'):
+            email = match.group('mailto').replace('%40', '@')
+            if not PLAIN_EMAIL.fullmatch(email.lower()):
+                continue
+            yield email.lower(), 'mailto', match.start()
+        elif match.group('cf'):
+            email = decode_cfemail(match.group('cf'))
+            if PLAIN_EMAIL.fullmatch(email.lower()):
+                yield email.lower(), 'cloudflare', match.start()
+        else:
+            local, domain = match.group('local'), match.group('domain')
+            email = (SEPARATOR_DOT.sub('.', local) + '@' + SEPARATOR_DOT.sub('.', domain)).lower()
+            if email.endswith(FILE_SUFFIXES):
+                continue
+            if WORD_AT_SEPARATOR.fullmatch(match.group('at')):
+                source = 'word'
+            elif match.group(0).lower() == email:
+                source = 'plain'
+            else:
+                source = 'obfuscated'
+            yield email, source, match.start()
+
+def name_tokens(name: str):
+    folded = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    return [t for t in re.split(r'[^a-z]+', folded) if t]
+
+def affiliation_keys(affiliation):
+    # Words of the affiliation plus its acronym, e.g. "mit" for "Massachusetts Institute of Technology".
+    tokens = name_tokens(affiliation or '')
+    words = {t for t in tokens if len(t) >= 3 and t not in AFFILIATION_STOPWORDS}
+    acronym = ''.join(t[0] for t in tokens if t not in {'of', 'the', 'and', 'for', 'at', 'de', 'la'})
+    if len(acronym) >= 2:
+        words.add(acronym)
+    return words
+
+def score_email(email: str, source: str, names, affiliation_words):
+    local, _, domain = email.partition('@')
+    local_letters = re.sub(r'[^a-z]', '', local)
+    score = {'mailto': 1, 'cloudflare': 1, 'plain': 0, 'obfuscated': 0, 'word': -1}[source]
+    name_score = 0
+    if names:
+        first, last = names[0], names[-1]
+        if len(last) >= 2 and last in local_letters:
+            name_score += 4
+        elif len(last) >= 4 and last[:4] in local_letters:
+            name_score += 2
+        if len(first) >= 3 and first in local_letters:
+            name_score += 2
+        elif local_letters in {first[0] + last, first + last[0], first[0] + last[:7]}:
+            name_score += 2
+    if source == 'word' and not name_score:
+        return -10
+    score += name_score
+    if local in GENERIC_LOCAL_PARTS:
+        score -= 3
+    domain_labels = set(domain.split('.'))
+    if affiliation_words & domain_labels or any(w in label for w in affiliation_words if len(w) >= 5 for label in domain_labels):
+        score += 2
+    if domain.endswith('.edu') or '.ac.' in domain or '.edu.' in domain:
+        score += 1
+    return score
+
+def extract_email(text: str, author: str, affiliation=None):
+    # Best-scoring address on the page for the author, or None when every candidate
+    # looks like it belongs to someone (or something) else.
+    names = name_tokens(author)
+    affiliation_words = affiliation_keys(affiliation)
+    best, best_score = None, None
+    seen = set()
+    for email, source, position in email_candidates(text):
+        if (email, source) in seen:
+            continue
+        seen.add((email, source))
+        score = score_email(email, source, names, affiliation_words)
+        if best_score is None or score > best_score:
+            best, best_score = email, score
+    if best_score is None or best_score < MIN_SCORE:
+        return None
+    return best
@@ -0,0 +1,231 @@
+import difflib
+import pickle
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+def normalize_name(name) -> str:
+    # Case-, accent- and punctuation-insensitive form: "Émile  Dupont-Roy" -> "emile dupont roy".
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", stripped.lower()))
+
+AFFILIATION_SEPARATOR_REGEX = re.compile(r"\s*[/;|]\s*")
+AFFILIATION_UNIT_REGEX = re.compile(r"^\s*(department|dept|school|faculty|division|lab|laboratory)\b", re.IGNORECASE)
+
+# Words that do not tell institutions apart: "Stanford", "Stanford University" and
+# "Stanford University/Pinterest" all reduce to the signature "stanford".
+GENERIC_AFFILIATION_TOKENS = {
+    "university", "univ", "universitat", "universite", "universidad", "universita", "institute",
+    "of", "the", "and", "for", "at", "in", "de", "la", "du", "des", "und", "fur", "di",
+    "inc", "ltd", "llc", "corp", "corporation", "company", "co", "gmbh", "research", "lab", "labs",
+}
+
+ACRONYM_STOPWORDS = {"of", "the", "and", "for", "at", "in", "de", "la", "du", "des", "und", "fur", "di"}
+# Normalized placeholders written when a speaker page lists no affiliation, e.g. "n/a".
+MISSING_AFFILIATIONS = {"", "n a", "na", "none", "unknown"}
+ENTITY_MAX_BLOCK = 500
+ENTITY_SIMILARITY = 0.92
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            self.parent[max(i, j)] = min(i, j)
+
+    def labels(self):
+        # Dense cluster IDs in order of each cluster's first member.
+        roots = [self.find(i) for i in range(len(self.parent))]
+        ids = {}
+        return np.array([ids.setdefault(root, len(ids)) for root in roots], dtype=np.int64)
+
+def _similar(a: str, b: str):
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio() >= ENTITY_SIMILARITY
+
+def _blocked_pairs(blocks):
+    # Candidate pairs: members sharing a blocking key. Oversized blocks (very common
+    # keys) are skipped; their members still merge on exact signatures.
+    seen = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > ENTITY_MAX_BLOCK:
+            continue
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pair = (members[x], members[y])
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+
+def _names_compatible(a, b):
+    # Token lists of two normalized author names: same last name, first names equal
+    # or one an initial of the other, and middle names that do not contradict.
+    if a[-1] != b[-1] or not (a[0] == b[0] or (min(len(a[0]), len(b[0])) == 1 and a[0][0] == b[0][0])):
+        return False
+    middle_a, middle_b = a[1:-1], b[1:-1]
+    if not middle_a or not middle_b:
+        return True
+    return len(middle_a) == len(middle_b) and all(x[0] == y[0] and (x == y or min(len(x), len(y)) == 1) for x, y in zip(middle_a, middle_b))
+
+class EntityIndex:
+    # Canonical IDs for the raw author and affiliation strings of a dataset, built
+    # after each scrape and saved next to it. Affiliations are blocked by normalized
+    # distinctive tokens and merged on equal signatures, acronyms ("MIT") and
+    # near-identical spellings. Author name variants ("J. Smith", "JOHN SMITH",
+    # "John A. Smith") are blocked by last name and first initial and merged when
+    # the names are compatible and the authors share an institution.
+    VERSION = 3
+
+    def __init__(self, df: pd.DataFrame):
+        affiliation_counts = df["Affiliation"].value_counts()
+        affiliation_counts = affiliation_counts[affiliation_counts > 0]
+        # Placeholders like "n/a" get no ID, so affiliation_codes maps them to -1 (no institution).
+        is_missing = [normalize_name(raw) in MISSING_AFFILIATIONS for raw in affiliation_counts.index]
+        affiliation_counts = affiliation_counts[~np.array(is_missing, dtype=bool)]
+        self._resolve_affiliations(list(affiliation_counts.index), affiliation_counts.to_numpy())
+
+        author_counts = df["Author"].value_counts()
+        author_counts = author_counts[author_counts > 0]
+        pairs = df[["Author", "Affiliation"]].dropna().drop_duplicates()
+        institutions = {}
+        for author, affiliation in zip(pairs["Author"].to_numpy(), pairs["Affiliation"].to_numpy()):
+            # Two name variants that both lack an affiliation do not share an institution.
+            if affiliation not in self.affiliation_ids:
+                continue
+            institutions.setdefault(author, set()).add(self.affiliation_ids[affiliation])
+        self._resolve_authors(list(author_counts.index), author_counts.to_numpy(), institutions)
+
+    @staticmethod
+    def affiliation_signature(raw: str):
+        primary = AFFILIATION_SEPARATOR_REGEX.split(str(raw).strip())[0] or str(raw)
+        parts = [p for p in primary.split(",") if p.strip()]
+        while len(parts) > 1 and AFFILIATION_UNIT_REGEX.match(parts[0]):
+            parts = parts[1:]
+        primary = ",".join(parts).strip() or primary
+        tokens = normalize_name(primary).split()
+        distinctive = sorted(set(t for t in tokens if t not in GENERIC_AFFILIATION_TOKENS)) or tokens
+        acronym = "".join(t[0] for t in tokens if t not in ACRONYM_STOPWORDS)
+        return primary, " ".join(distinctive), acronym
+
+    def _resolve_affiliations(self, raws, counts):
+        signatures = [self.affiliation_signature(raw) for raw in raws]
+        clusters = _UnionFind(len(raws))
+        by_signature, blocks = {}, {}
+        for i, (_, signature, _) in enumerate(signatures):
+            first = by_signature.setdefault(signature, i)
+            if first != i:
+                clusters.union(first, i)
+                continue
+            for token in signature.split():
+                if len(token) >= 5:
+                    blocks.setdefault(token[:4], []).append(i)
+        for i, j in _blocked_pairs(blocks):
+            a, b = signatures[i][1], signatures[j][1]
+            if len(a.split()) == len(b.split()) and min(len(a), len(b)) >= 6 and _similar(a, b):
+                clusters.union(i, j)
+        # "MIT" joins "Massachusetts Institute of Technology" when the acronym points at a single cluster.
+        acronyms = {}
+        for i, (_, signature, acronym) in enumerate(signatures):
+            if len(acronym) >= 3 and acronym != signature:
+                acronyms.setdefault(acronym, set()).add(clusters.find(i))
+        for i, (_, signature, _) in enumerate(signatures):
+            candidates = acronyms.get(signature, ())
+            if len(candidates) == 1:
+                clusters.union(i, next(iter(candidates)))
+
+        labels = clusters.labels()
+        self.affiliation_ids = dict(zip(raws, labels.tolist()))
+        self.affiliation_ids_by_signature = {signature: label for (_, signature, _), label in zip(signatures, labels.tolist())}
+        # Display name: the most common primary spelling in the cluster (raws come most frequent first).
+        names = {}
+        spelling_counts = {}
+        for (primary, _, _), label, count in zip(signatures, labels, counts):
+            spelling_counts[(label, primary)] = spelling_counts.get((label, primary), 0) + count
+        for (label, primary), count in spelling_counts.items():
+            if label not in names or count > names[label][1]:
+                names[label] = (primary, count)
+        self.affiliation_names = np.array([names[label][0] for label in range(len(names))], dtype=object)
+
+    def _resolve_authors(self, raws, counts, institutions):
+        tokens = [normalize_name(raw).split() or [str(raw).lower()] for raw in raws]
+        clusters = _UnionFind(len(raws))
+        by_name, blocks = {}, {}
+        for i, name in enumerate(tokens):
+            key = " ".join(name)
+            first = by_name.setdefault(key, i)
+            if first != i:
+                clusters.union(first, i)
+                continue
+            blocks.setdefault((name[-1], name[0][0]), []).append(i)
+        # Full first names seen in each cluster; "J. Smith" must not chain "John Smith" and "Jane Smith" together.
+        first_names = {i: {name[0]} if len(name[0]) > 1 else set() for i, name in enumerate(tokens)}
+        for i, j in _blocked_pairs(blocks):
+            if not institutions.get(raws[i], set()) & institutions.get(raws[j], set()):
+                continue
+            a, b = tokens[i], tokens[j]
+            if not (_names_compatible(a, b) or _similar(" ".join(a), " ".join(b))):
+                continue
+            root_i, root_j = clusters.find(i), clusters.find(j)
+            if root_i == root_j or len(first_names[root_i] | first_names[root_j]) > 1:
+                continue
+            clusters.union(root_i, root_j)
+            first_names[clusters.find(i)] = first_names[root_i] | first_names[root_j]
+
+        labels = clusters.labels()
+        self.author_ids = dict(zip(raws, labels.tolist()))
+        # raws come most frequent first, so each cluster is named after its most common spelling.
+        names = {}
+        for raw, label in zip(raws, labels):
+            names.setdefault(label, raw)
+        self.author_names = np.array([names[label] for label in range(len(names))], dtype=object)
+
+    @staticmethod
+    def _codes(values: pd.Series, ids):
+        codes, uniques = pd.factorize(values)
+        lookup = np.array([ids.get(value, -1) for value in uniques] + [-1], dtype=np.int64)
+        return lookup[codes]
+
+    def author_codes(self, authors: pd.Series):
+        return self._codes(authors, self.author_ids)
+
+    def affiliation_codes(self, affiliations: pd.Series):
+        return self._codes(affiliations, self.affiliation_ids)
+
+    def summary(self):
+        return (
+            f"{len(self.author_ids)} author names -> {len(self.author_names)} authors, "
+            f"{len(self.affiliation_ids)} affiliation strings -> {len(self.affiliation_names)} institutions"
+        )
+
+    @staticmethod
+    def path_for(output: str):
+        return f"{output}.entities.pkl"
+
+    @classmethod
+    def load_or_build(cls, path: str, fingerprint, df: pd.DataFrame):
+        # Bumping VERSION discards indexes saved by older resolution rules.
+        fingerprint = (cls.VERSION, fingerprint)
+        try:
+            with open(path, "rb") as f:
+                saved_fingerprint, entities = pickle.load(f)
+            if saved_fingerprint == fingerprint:
+                return entities
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError, AttributeError):
+            pass
+        entities = cls(df)
+        try:
+            with open(path, "wb") as f:
+                pickle.dump((fingerprint, entities), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"Warning: could not save entity index to {path}: {e}")
+        return entities
@@ -0,0 +1,425 @@
+import asyncio
+import base64
+import email.policy
+import getpass
+import hashlib
+import io
+import json
+import mmap
+import os
+import random
+import re
+import smtplib
+import sqlite3
+import ssl
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import numpy as np
+import pandas as pd
+
+from entities import normalize_name
+from ratelimit import RateLimiter
+from storage import open_paper_store, open_store
+
+class AttachmentSet:
+    # The PDFs in the mail folder, read and base64-encoded once per run. `tail` is the
+    # finished wire form of every attachment part (CRLF line endings, closing boundary
+    # included) and is sent unchanged after each recipient's headers and body. With
+    # use_mmap the parts are encoded block by block into a spool file that is then
+    # memory-mapped, so neither the PDFs nor their encoding are held in the Python heap.
+    READ_BLOCK = 57 * 1024  # whole 76-character base64 lines per block
+
+    def __init__(self, folder: str = "mail/", boundary: str = None, use_mmap: bool = False):
+        self.folder = folder
+        self.boundary = boundary or f"==============={random.getrandbits(63):019d}=="
+        self.names = ()
+        try:
+            self.names = tuple(sorted(f for f in os.listdir(folder) if f.lower().endswith('.pdf')))
+            if not self.names:
+                print(f"Warning: No PDF files found in {folder} to attach.")
+        except FileNotFoundError:
+            print(f"Warning: The directory {folder} was not found. Sending without attachments.")
+
+        self._spool = None
+        self._mapped = None
+        out = tempfile.TemporaryFile() if use_mmap else io.BytesIO()
+        try:
+            self.write_parts(out)
+            self.size = out.tell()
+            if use_mmap:
+                out.flush()
+                self._spool = out
+                self._mapped = mmap.mmap(out.fileno(), 0, access=mmap.ACCESS_READ)
+                self.tail = memoryview(self._mapped)
+            else:
+                self.tail = out.getvalue()
+        except BaseException:
+            out.close()
+            raise
+
+    def write_parts(self, out):
+        delimiter = f"--{self.boundary}".encode()
+        for name in self.names:
+            part = MIMEBase("application", "octet-stream")
+            part["Content-Transfer-Encoding"] = "base64"
+            part.add_header("Content-Disposition", f"attachment; filename={name}")
+            # The headers are serialized on their own; the body is encoded straight
+            # from the file so only one block of it is in memory at a time.
+            part.set_payload("")
+            out.write(delimiter + b"\r\n")
+            out.write(part.as_bytes(policy=email.policy.SMTP))
+            with open(os.path.join(self.folder, name), "rb") as f:
+                while block := f.read(self.READ_BLOCK):
+                    out.write(base64.encodebytes(block).replace(b"\n", b"\r\n"))
+            out.write(b"\r\n")
+        out.write(delimiter + b"--\r\n")
+
+    def close(self):
+        # Releases the spool file and its mapping; safe to call more than once.
+        if self._spool is None:
+            return
+        self.tail.release()
+        self._mapped.close()
+        self._spool.close()
+        self._spool = self._mapped = None
+        self.tail = b""
+
+class OutreachTemplate:
+    # Subject and body templates split once into literal text and [PLACEHOLDER]s,
+    # so rendering a recipient's message is a join plus their headers.
+    PLACEHOLDER_REGEX = re.compile(r'\[(TITLE|LAST_NAME|MOST_RECENT_PAPER)\]')
+    LEADING_DOT_REGEX = re.compile(rb'^\.', re.MULTILINE)
+
+    def __init__(self, subject: str, body: str, attachments: AttachmentSet):
+        self.subject_parts = self.PLACEHOLDER_REGEX.split(subject)
+        self.body_parts = self.PLACEHOLDER_REGEX.split(body)
+        self.attachments = attachments
+        self.closing = f"--{attachments.boundary}--".encode()
+
+    @classmethod
+    def load(cls, path: str, attachments: AttachmentSet):
+        # The first line of the file is the subject, the rest is the body.
+        with open(path, 'r') as f:
+            lines = f.readlines()
+        subject = lines[0].strip() if lines else "Research Opportunities Inquiry"
+        body = "".join(lines[1:]) if len(lines) > 1 else ""
+        return cls(subject, body, attachments)
+
+    @staticmethod
+    def fill(parts, values):
+        # Odd positions of a split template are placeholder names.
+        return "".join(values[part] if i % 2 else part for i, part in enumerate(parts))
+
+    def render(self, sender: str, recipient: str, values):
+        # Returns the message as dot-stuffed CRLF chunks ready for SMTP DATA.
+        message = MIMEMultipart(boundary=self.attachments.boundary, policy=email.policy.SMTP)
+        message["From"] = sender
+        message["To"] = recipient
+        message["Subject"] = self.fill(self.subject_parts, values)
+        message.attach(MIMEText(self.fill(self.body_parts, values), "plain", policy=email.policy.SMTP))
+        head = message.as_bytes()
+        head = self.LEADING_DOT_REGEX.sub(b"..", head[:head.rindex(self.closing)])
+        return [head, self.attachments.tail]
+
+class DeliveryUnknown(Exception):
+    # The connection dropped after the message was handed over, before the server
+    # confirmed it; the message may or may not have been delivered.
+    pass
+
+def send_rendered(server, sender: str, recipient: str, chunks):
+    # smtplib's sendmail rewrites the line endings of the whole message on every call;
+    # rendered chunks are already in wire form, so DATA is written to the socket as is.
+    server.ehlo_or_helo_if_needed()
+    code, response = server.mail(sender)
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPSenderRefused(code, response, sender)
+    code, response = server.rcpt(recipient)
+    if code not in (250, 251):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused({recipient: (code, response)})
+    code, response = server.docmd("data")
+    if code != 354:
+        server.rset()
+        raise smtplib.SMTPDataError(code, response)
+    for chunk in chunks:
+        server.sock.sendall(chunk)
+    server.sock.sendall(b".\r\n")
+    try:
+        code, response = server.getreply()
+    except (smtplib.SMTPServerDisconnected, OSError) as e:
+        raise DeliveryUnknown(f"connection lost before the server confirmed delivery: {e}")
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPDataError(code, response)
+
+def is_connection_drop(error: Exception):
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError, ssl.SSLError))
+
+class SmtpPool:
+    # One authenticated SMTP connection per worker thread, opened on first use and
+    # reopened when the server drops it. A send that fails before the message was
+    # handed over is retried once on a fresh connection.
+    def __init__(self, host: str, port: int, security: str, username: str, password: str, connections: int):
+        self.host = host
+        self.port = port
+        self.security = security
+        self.username = username
+        self.password = password
+        self.connections = connections
+        self.executor = ThreadPoolExecutor(max_workers=connections, thread_name_prefix="smtp")
+        self.local = threading.local()
+        self.servers = []
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.security == "ssl":
+            server = smtplib.SMTP_SSL(self.host, self.port, context=ssl.create_default_context(), timeout=60)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=60)
+            if self.security == "starttls":
+                server.starttls(context=ssl.create_default_context())
+        if self.password:
+            server.login(self.username, self.password)
+        with self.lock:
+            self.servers.append(server)
+        return server
+
+    def login(self):
+        # Opens the calling worker thread's connection.
+        if getattr(self.local, "server", None) is None:
+            self.local.server = self.connect()
+
+    def drop(self, server):
+        with self.lock:
+            if server in self.servers:
+                self.servers.remove(server)
+        try:
+            server.close()
+        except Exception:
+            pass
+
+    def send(self, sender: str, recipient: str, chunks):
+        for attempt in range(2):
+            server = getattr(self.local, "server", None)
+            if server is None:
+                server = self.local.server = self.connect()
+            try:
+                send_rendered(server, sender, recipient, chunks)
+                return
+            except Exception as e:
+                if not is_connection_drop(e):
+                    raise
+                self.local.server = None
+                self.drop(server)
+                if attempt:
+                    raise
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            servers, self.servers = self.servers, []
+        for server in servers:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+class SendJournal:
+    # SQLite record of outreach deliveries, keyed by campaign (template and test
+    # address) and recipient. A row is written as "pending" before a message goes
+    # out and updated once the outcome is known, so an interrupted run can resume:
+    # "sent" rows are skipped, "failed" rows are retried, and "pending"/"unknown"
+    # rows (possibly delivered) are skipped with a warning.
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS sends (campaign TEXT, recipient TEXT, author TEXT, status TEXT, "
+            "updated_at REAL, error TEXT, PRIMARY KEY (campaign, recipient))"
+        )
+        self.db.commit()
+
+    @staticmethod
+    def campaign(template: OutreachTemplate, test_email=None):
+        text = json.dumps([template.subject_parts, template.body_parts, test_email])
+        return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+    def status(self, campaign: str, recipient: str):
+        row = self.db.execute(
+            "SELECT status FROM sends WHERE campaign = ? AND recipient = ?", (campaign, recipient.lower())
+        ).fetchone()
+        return row[0] if row else None
+
+    def record(self, campaign: str, recipient: str, author: str, status: str, error: str = None):
+        self.db.execute(
+            "INSERT OR REPLACE INTO sends (campaign, recipient, author, status, updated_at, error) VALUES (?, ?, ?, ?, ?, ?)",
+            (campaign, recipient.lower(), author, status, time.time(), error),
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+def latest_paper_titles(papers_df):
+    # normalize_name(author) -> title of their most recent paper, from one groupby over
+    # the dataset. Names are normalized per distinct author, not per row.
+    authors = papers_df["Author"].astype("category")
+    codes = authors.cat.codes.to_numpy()
+    keys = np.asarray(authors.cat.categories.map(normalize_name), dtype=object)
+    known = codes >= 0
+    frame = pd.DataFrame({
+        "key": keys[codes[known]],
+        "Year": pd.to_numeric(papers_df["Year"], errors="coerce").to_numpy()[known],
+        "Title": papers_df["Title"].to_numpy()[known],
+    }).dropna(subset=["Year"])
+    latest = frame.loc[frame.groupby("key", sort=False)["Year"].idxmax()]
+    return dict(zip(latest["key"], latest["Title"]))
+
+def outreach_recipient(contact_info, latest_titles, prof_flag, test_email=None):
+    # Returns (author_name, recipient_email, send_to, template values), or None for contacts without a usable email.
+    author_name = contact_info["Author"]
+    if author_name.isupper():
+        author_name = author_name.title()
+
+    last_name = author_name.split(' ')[-1]
+    title = "Professor" if prof_flag else "Mr."
+
+    paper_title = latest_titles.get(normalize_name(author_name), "which you submitted to NeurIPS")
+
+    recipient_email = contact_info['Email']
+
+    if not recipient_email or \
+    pd.isna(recipient_email) or \
+    '@' not in recipient_email or \
+    "email@" in recipient_email or \
+    "myfirstname" in recipient_email or \
+    "mylastname" in recipient_email or \
+    "admissions" in recipient_email or \
+    "support" in recipient_email:
+        print(f"Skipping {author_name} due to invalid email.")
+        return None
+
+    values = {"TITLE": title, "LAST_NAME": last_name, "MOST_RECENT_PAPER": paper_title}
+    return author_name, recipient_email, test_email or recipient_email, values
+
+async def deliver_outreach(pool: SmtpPool, journal: SendJournal, sender_email, contacts, papers_df, template: OutreachTemplate, prof_flag, test_email=None, send_rate: float = 0):
+    # Rendering happens on the event loop; SMTP conversations run on the pool's threads,
+    # at most one in flight per connection and no faster than send_rate messages/sec.
+    campaign = SendJournal.campaign(template, test_email)
+    rate_limiter = RateLimiter(send_rate)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(pool.connections)
+    counts = {"sent": 0, "failed": 0, "skipped": 0}
+    # Set when a connection's login is rejected; queued messages are then not attempted.
+    auth_failed = asyncio.Event()
+
+    async def deliver(author_name, recipient_email, to_email, values):
+        status = journal.status(campaign, recipient_email)
+        if status == "sent":
+            counts["skipped"] += 1
+            return
+        if status in ("pending", "unknown"):
+            print(f"Skipping {author_name}: an earlier run may already have emailed {recipient_email}.")
+            counts["skipped"] += 1
+            return
+        async with semaphore:
+            await rate_limiter.wait()
+            if auth_failed.is_set():
+                return
+            try:
+                chunks = template.render(sender_email, to_email, values)
+            except Exception as e:
+                journal.record(campaign, recipient_email, author_name, "failed", f"could not render the template: {e}")
+                counts["failed"] += 1
+                print(f"Failed to prepare the email to {to_email}: {e}")
+                return
+            journal.record(campaign, recipient_email, author_name, "pending")
+            if test_email:
+                print(f"TEST MODE: Sending email for {author_name} to {test_email} (original: {recipient_email})")
+            try:
+                await loop.run_in_executor(pool.executor, pool.send, sender_email, to_email, chunks)
+            except DeliveryUnknown as e:
+                journal.record(campaign, recipient_email, author_name, "unknown", str(e))
+                counts["failed"] += 1
+                print(f"Delivery to {to_email} is unconfirmed: {e}")
+            except smtplib.SMTPAuthenticationError:
+                journal.record(campaign, recipient_email, author_name, "failed", "authentication failed")
+                auth_failed.set()
+                raise
+            except Exception as e:
+                journal.record(campaign, recipient_email, author_name, "failed", str(e))
+                counts["failed"] += 1
+                print(f"Failed to send email to {to_email}: {e}")
+            else:
+                journal.record(campaign, recipient_email, author_name, "sent")
+                counts["sent"] += 1
+                print(f"Email sent to {author_name} at {to_email}")
+
+    latest_titles = latest_paper_titles(papers_df)
+    recipients = {}
+    for contact_info in contacts:
+        recipient = outreach_recipient(contact_info, latest_titles, prof_flag, test_email)
+        if recipient is not None:
+            recipients.setdefault(recipient[1].lower(), recipient)
+    # Every delivery finishes (and is journaled) before an error is raised, so the
+    # caller never closes the pool or the journal under a send still in flight.
+    results = await asyncio.gather(*(deliver(*recipient) for recipient in recipients.values()), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return counts
+
+async def run_outreach(args, contacts, papers_df, template: OutreachTemplate):
+    sender_email = input("Please enter your Gmail address: ")
+    password = getpass.getpass("Please enter your Gmail password or app password: ")
+
+    pool = SmtpPool(args.smtp_host, args.smtp_port, args.smtp_security, sender_email, password, args.smtp_connections)
+    journal = SendJournal(args.send_journal)
+    try:
+        # Log in once up front so bad credentials are reported before anything is sent.
+        await asyncio.get_running_loop().run_in_executor(pool.executor, pool.login)
+        print("Logged in successfully. Starting to send emails...")
+        counts = await deliver_outreach(pool, journal, sender_email, contacts, papers_df, template, args.prof, args.test, args.send_rate)
+        print(f"Outreach finished: {counts['sent']} sent, {counts['failed']} failed, {counts['skipped']} already handled in an earlier run.")
+    except smtplib.SMTPAuthenticationError:
+        print("Failed to login. Please check your email and password.")
+        print("If you use 2-Step Verification, you may need to create an App Password.")
+    except Exception as e:
+        print(f"An error occurred while sending emails: {e}")
+    finally:
+        pool.close()
+        journal.close()
+        template.attachments.close()
+
+async def outreach_mode(args):
+    try:
+        contacts_df = open_store(args.contacts_file).read()
+    except FileNotFoundError:
+        print(f"Error: Contacts file '{args.contacts_file}' not found.")
+        return
+
+    try:
+        papers_df = open_paper_store(args.output).read()
+    except FileNotFoundError:
+        print(f"Error: Papers file '{args.output}' not found. This is needed to find the most recent paper.")
+        return
+
+    attachments = AttachmentSet(use_mmap=args.mmap_attachments)
+    try:
+        template = OutreachTemplate.load(args.email_template, attachments)
+    except FileNotFoundError:
+        attachments.close()
+        print(f"Error: Email template file '{args.email_template}' not found.")
+        return
+
+    contacts = [row.to_dict() for _, row in contacts_df.iterrows()]
+    await run_outreach(args, contacts, papers_df, template)
@@ -0,0 +1,182 @@
+import bisect
+import contextlib
+import json
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets, as in Prometheus' defaults
+# stretched to cover slow hosts; the last bucket is +Inf.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float):
+        # Interpolated within the bucket holding the q-th observation, like histogram_quantile().
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+class Metrics:
+    # Latency histograms per stage and label set, e.g. ("network", host=icml.cc,
+    # conference="ICML 2024") or ("command", command=/top). Only created with
+    # --profile or --metrics-out; every hook is skipped while METRICS is None.
+    def __init__(self):
+        self.histograms = {}
+        self.started = time.perf_counter()
+
+    def observe(self, stage: str, seconds: float, **labels):
+        key = (stage, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, stage: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def grouped(self, stage: str, label: str = None):
+        groups = {}
+        for (s, labels), histogram in self.histograms.items():
+            if s != stage:
+                continue
+            value = dict(labels).get(label) if label else None
+            groups.setdefault(value, LatencyHistogram()).merge(histogram)
+        return groups
+
+    def to_json(self):
+        return {
+            "elapsed_seconds": time.perf_counter() - self.started,
+            "buckets": list(LATENCY_BUCKETS),
+            "series": [
+                {
+                    "stage": stage,
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": h.sum,
+                    "max": h.max,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99),
+                    "buckets": h.buckets,
+                }
+                for (stage, labels), h in sorted(self.histograms.items())
+            ],
+        }
+
+    def merge_json(self, data):
+        # Folds in another process's to_json(), e.g. a scrape worker's (--workers).
+        for series in data["series"]:
+            histogram = LatencyHistogram()
+            histogram.buckets = list(series["buckets"])
+            histogram.count, histogram.sum, histogram.max = series["count"], series["sum"], series["max"]
+            key = (series["stage"], tuple(sorted(series["labels"].items())))
+            self.histograms.setdefault(key, LatencyHistogram()).merge(histogram)
+
+    def to_prometheus(self, name: str = "research_stage_seconds"):
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = [f"# HELP {name} Time spent per stage of scrape and analyze.", f"# TYPE {name} histogram"]
+        for (stage, labels), h in sorted(self.histograms.items()):
+            labels = (("stage", stage),) + labels
+            cumulative = 0
+            for bound, n in zip(list(LATENCY_BUCKETS) + ["+Inf"], h.buckets):
+                cumulative += n
+                lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{label_text(labels)} {h.sum}")
+            lines.append(f"{name}_count{label_text(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        text = json.dumps(self.to_json(), indent=1) if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w") as f:
+            f.write(text)
+
+    def summary(self, breakdowns=(("queue_wait", "host"), ("network", "host"), ("parse", "conference"), ("extract", "conference"), ("unit", "conference"), ("load", "step"), ("command", "command"))):
+        stages = sorted({stage for stage, _ in self.histograms}, key=lambda s: (STAGE_ORDER.index(s) if s in STAGE_ORDER else len(STAGE_ORDER), s))
+        lines = [f"{'stage':<28} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+
+        def row(title, h):
+            lines.append(
+                f"{title[:28]:<28} {h.count:>7} {h.sum:>9.2f} {1000 * h.sum / max(1, h.count):>9.1f} "
+                f"{1000 * h.quantile(0.5):>9.1f} {1000 * h.quantile(0.95):>9.1f} {1000 * h.max:>9.1f}"
+            )
+
+        for stage in stages:
+            for h in self.grouped(stage).values():
+                row(stage, h)
+            for breakdown_stage, label in breakdowns:
+                if breakdown_stage != stage:
+                    continue
+                groups = self.grouped(stage, label)
+                if len(groups) > 1 or None not in groups:
+                    for value, h in sorted(groups.items(), key=lambda item: -item[1].sum):
+                        row(f"  {value}", h)
+        return "\n".join(lines)
+
+STAGE_ORDER = ["queue_wait", "connection_queue", "dns", "connect", "network", "parse_queue", "parse", "extract", "unit", "merge", "load", "command"]
+METRICS: Metrics = None
+
+def stage_timer(stage: str, **labels):
+    return METRICS.timer(stage, **labels) if METRICS is not None else contextlib.nullcontext()
+
+def record_trace_config():
+    # aiohttp request tracing, used while profiling to split connection setup
+    # (DNS, TCP+TLS connect, waits for a pooled connection) out of network time.
+    async def on_request_start(session, ctx, params):
+        ctx.labels = (ctx.trace_request_ctx or {}).get("labels", {})
+
+    def timing(stage):
+        async def on_start(session, ctx, params):
+            setattr(ctx, stage, time.perf_counter())
+
+        async def on_end(session, ctx, params):
+            start = getattr(ctx, stage, None)
+            if start is not None and METRICS is not None:
+                METRICS.observe(stage, time.perf_counter() - start, host=getattr(ctx, "labels", {}).get("host"))
+        return on_start, on_end
+
+    import aiohttp
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    for stage, signals in [
+        ("dns", (trace_config.on_dns_resolvehost_start, trace_config.on_dns_resolvehost_end)),
+        ("connect", (trace_config.on_connection_create_start, trace_config.on_connection_create_end)),
+        ("connection_queue", (trace_config.on_connection_queued_start, trace_config.on_connection_queued_end)),
+    ]:
+        on_start, on_end = timing(stage)
+        signals[0].append(on_start)
+        signals[1].append(on_end)
+    return trace_config
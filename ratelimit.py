@@ -0,0 +1,19 @@
+import asyncio
+import time
+
+# Kept free of third-party imports: outreach and contact lookup both pace their
+# requests with it, and outreach should not pay for aiohttp to do so.
+
+class RateLimiter:
+    # Spaces calls at least 1/rate seconds apart across all concurrent callers.
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = time.monotonic() + self.interval
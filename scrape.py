@@ -0,0 +1,835 @@
+import asyncio
+import contextlib
+import datetime
+import email.utils
+import functools
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import aiohttp
+import lxml.html
+import pandas as pd
+import yarl
+from tqdm import tqdm
+
+import profiling
+from entities import EntityIndex
+from profiling import record_trace_config
+from storage import PAPER_COLUMNS, open_paper_store
+
+REQUESTS_PBAR: tqdm = None
+REQUEST_SCHEDULER: "RequestScheduler" = None
+RESPONSE_CACHE: "ResponseCache" = None
+AUTHOR_RESOLVER: "AuthorResolver" = None
+PARSE_POOL: ProcessPoolExecutor = None
+PAGE_PARSER = "lxml"
+SPEAKER_ID_REGEX = re.compile(r"showSpeaker\('([\d-]+)'\)")
+URL_YEAR_REGEX = re.compile(r"/Conferences/(\d{4})/")
+
+class RetryableStatus(aiohttp.ClientResponseError):
+    # Raised for 429/5xx responses so retry_on_server_disconnect backs off and retries them.
+    def __init__(self, response: aiohttp.ClientResponse, retry_after: float = None):
+        super().__init__(response.request_info, response.history, status=response.status, message=response.reason or "")
+        self.retry_after = retry_after
+
+def parse_retry_after(value: str):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_on_server_disconnect(n_tries: int, base_delay: float = 0.5, max_delay: float = 30):
+    def decorator(f):
+        @functools.wraps(f)
+        async def wrapper(*args, **kwargs):
+            for i in range(n_tries):
+                try:
+                    return await f(*args, **kwargs)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if i == n_tries - 1:
+                        print(f"A client error occurred: {e}")
+                        raise
+                    # Exponential backoff with full jitter, unless the server told us how long to wait.
+                    delay = getattr(e, "retry_after", None)
+                    if delay is None:
+                        delay = random.uniform(0, min(max_delay, base_delay * 2**i))
+                    await asyncio.sleep(min(delay, max_delay))
+        return wrapper
+    return decorator
+
+class HostLimiter:
+    # AIMD concurrency window for one host: grows by ~1 request per window of
+    # successes, halves on errors/throttling and shrinks gently when recent
+    # latency climbs well above the long-run average, with at most one decrease
+    # per round trip so a burst of failures only counts once.
+    def __init__(self, initial: int, max_limit: int):
+        self.limit = float(min(initial, max_limit))
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency = None
+        self.long_latency = None
+        self.last_decrease = 0.0
+        self.requests = 0
+        self.errors = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self, ok: bool, latency: float):
+        self.requests += 1
+        if ok:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            self.long_latency = latency if self.long_latency is None else 0.98 * self.long_latency + 0.02 * latency
+            if self.requests > 20 and self.latency > 2 * self.long_latency:
+                self._decrease(0.9)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        else:
+            self.errors += 1
+            self._decrease(0.5)
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self.last_decrease < (self.latency or 0.1):
+            return
+        self.last_decrease = now
+        self.limit = max(1.0, self.limit * factor)
+
+class RequestScheduler:
+    def __init__(self, initial_per_host: int, max_per_host: int):
+        self.initial_per_host = initial_per_host
+        self.max_per_host = max_per_host
+        self.hosts = {}
+
+    def limiter_for(self, url: str):
+        host = yarl.URL(url).host
+        if host not in self.hosts:
+            self.hosts[host] = HostLimiter(self.initial_per_host, self.max_per_host)
+        return self.hosts[host]
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str):
+        limiter = self.limiter_for(url)
+        await limiter.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            yield limiter
+            ok = True
+        finally:
+            await limiter.release(ok, time.monotonic() - start)
+
+    def summary(self):
+        return ", ".join(
+            f"{host}: limit {limiter.limit:.0f}, {limiter.errors}/{limiter.requests} errors"
+            for host, limiter in self.hosts.items()
+        )
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    # Serializes the read-merge-write of files shared between processes.
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class ResponseCache:
+    # Bodies live in objects/<sha256 of body>, so identical pages are stored once;
+    # index.json maps each URL to its object and the validators needed to revalidate it.
+    def __init__(self, root: str, max_bytes: int, fresh_ttl: float, offline: bool = False):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.json")
+        self.max_bytes = max_bytes
+        self.fresh_ttl = fresh_ttl
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._dirty = 0
+        os.makedirs(self.objects_dir, exist_ok=True)
+        try:
+            with open(self.index_path, "r") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def ttl_for(self, url: str, entry):
+        # A page of a conference-year is frozen once it was fetched after that year
+        # ended; copies fetched while the year was in progress are still revalidated.
+        match = URL_YEAR_REGEX.search(url)
+        if match and entry["fetched_at"] >= datetime.datetime(int(match[1]) + 1, 1, 1).timestamp():
+            return None
+        return self.fresh_ttl
+
+    def lookup(self, url: str):
+        entry = self.entries.get(url)
+        if entry is None or not os.path.exists(self._object_path(entry["digest"])):
+            return None
+        return entry
+
+    def is_fresh(self, url: str, entry) -> bool:
+        ttl = self.ttl_for(url, entry)
+        return ttl is None or time.time() - entry["fetched_at"] < ttl
+
+    def revalidation_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read(self, entry) -> str:
+        entry["accessed_at"] = time.time()
+        with open(self._object_path(entry["digest"]), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def refresh(self, entry):
+        entry["fetched_at"] = time.time()
+        self._mark_dirty()
+
+    def store(self, url: str, text: str, headers):
+        body = text.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        now = time.time()
+        self.entries[url] = {
+            "digest": digest,
+            "size": len(body),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": now,
+            "accessed_at": now,
+        }
+        self._mark_dirty()
+
+    def evict(self):
+        sizes = {e["digest"]: e["size"] for e in self.entries.values()}
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        refcounts = {}
+        for e in self.entries.values():
+            refcounts[e["digest"]] = refcounts.get(e["digest"], 0) + 1
+        for url, entry in sorted(self.entries.items(), key=lambda item: item[1]["accessed_at"]):
+            if total <= self.max_bytes:
+                break
+            del self.entries[url]
+            refcounts[entry["digest"]] -= 1
+            if refcounts[entry["digest"]] == 0:
+                total -= entry["size"]
+                try:
+                    os.remove(self._object_path(entry["digest"]))
+                except FileNotFoundError:
+                    pass
+
+    def save(self):
+        # Scrape worker processes (--workers) share one cache, so pages other
+        # processes stored since this one loaded the index are merged in first.
+        with file_lock(f"{self.index_path}.lock"):
+            try:
+                with open(self.index_path, "r") as f:
+                    saved = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                saved = {}
+            for url, entry in saved.items():
+                mine = self.entries.get(url)
+                if mine is None or entry["fetched_at"] > mine["fetched_at"]:
+                    self.entries[url] = entry
+            self.evict()
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.index_path)
+        self._dirty = 0
+
+    def _mark_dirty(self):
+        self._dirty += 1
+        if self._dirty >= 1000:
+            self.save()
+
+    def _object_path(self, digest: str):
+        return os.path.join(self.objects_dir, digest)
+
+async def fetch_page_text(session: aiohttp.ClientSession, url: str, labels=None):
+    global RESPONSE_CACHE, REQUEST_SCHEDULER
+    cache = RESPONSE_CACHE
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None and (cache.offline or cache.is_fresh(url, entry)):
+        cache.hits += 1
+        return cache.read(entry)
+    if cache is not None and cache.offline:
+        cache.misses += 1
+        return None
+
+    headers = cache.revalidation_headers(entry) if entry is not None else {}
+    queued = time.perf_counter()
+    async with REQUEST_SCHEDULER.slot(url) as limiter, contextlib.AsyncExitStack() as timers:
+        if profiling.METRICS is not None:
+            labels = labels or {"host": yarl.URL(url).host}
+            profiling.METRICS.observe("queue_wait", time.perf_counter() - queued, **labels)
+            timers.enter_context(profiling.METRICS.timer("network", **labels))
+        async with session.get(url, headers=headers, trace_request_ctx={"labels": labels}) as response:
+            if response.status == 429 or response.status >= 500:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    limiter.pause(retry_after)
+                raise RetryableStatus(response, retry_after)
+            if response.status == 304 and entry is not None:
+                cache.revalidated += 1
+                cache.refresh(entry)
+                return cache.read(entry)
+            text = await response.text()
+            if cache is not None:
+                cache.misses += 1
+                if response.status == 200:
+                    cache.store(url, text, response.headers)
+            return text
+
+def _class_xpath(*classes):
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in classes)
+
+POSTER_CARDS_XPATH = f"//*[{_class_xpath('maincard', 'poster')}]"
+MAINCARD_BOX_XPATH = f"(//*[{_class_xpath('maincard')}])[1]/.."
+MAINCARD_BODY_XPATH = f".//*[{_class_xpath('maincardBody')}]"
+
+# The extractors below are pure functions of the page text so they can run inline
+# or in PARSE_POOL. "lxml" walks the tree with targeted XPath; "bs4" is the original
+# BeautifulSoup implementation and is kept as the reference. Each is split into
+# building the document and reading fields from it so --profile can time both.
+def parse_document(text: str, parser: str = "lxml"):
+    if parser == "bs4":
+        import bs4
+        return bs4.BeautifulSoup(text, features="lxml")
+    if not text.strip():
+        return None
+    return lxml.html.fromstring(text)
+
+def paper_ids_from(doc, parser: str = "lxml"):
+    if parser == "bs4":
+        cards = doc.select(".maincard.poster")
+        return [c.attrs["id"][9:] for c in cards]
+    if doc is None:
+        return []
+    cards = doc.xpath(POSTER_CARDS_XPATH)
+    return [c.get("id")[9:] for c in cards]
+
+def paper_from(doc, parser: str = "lxml"):
+    if parser == "bs4":
+        box = doc.select(".maincard")[0].parent
+        title = box.select(".maincardBody")[0].text.strip()
+        authors = [
+            (b.text.strip(), SPEAKER_ID_REGEX.match(b.attrs["onclick"]).group(1))
+            for b in box.find_all("button")
+            if "showSpeaker" in b.attrs.get("onclick", "")
+        ]
+        return title, authors
+    box = doc.xpath(MAINCARD_BOX_XPATH)[0]
+    title = box.xpath(MAINCARD_BODY_XPATH)[0].text_content().strip()
+    authors = [
+        (b.text_content().strip(), SPEAKER_ID_REGEX.match(b.get("onclick")).group(1))
+        for b in box.iter("button")
+        if "showSpeaker" in b.get("onclick", "")
+    ]
+    return title, authors
+
+def author_from(doc, parser: str = "lxml"):
+    if parser == "bs4":
+        box = doc.select(".maincard")[0].parent
+        name = box.find("h3").text.strip()
+        affiliation = box.find("h4").text.strip()
+        return name, affiliation
+    box = doc.xpath(MAINCARD_BOX_XPATH)[0]
+    name = next(box.iter("h3")).text_content().strip()
+    affiliation = next(box.iter("h4")).text_content().strip()
+    return name, affiliation
+
+def extract_paper_ids(text: str, parser: str = "lxml"):
+    return paper_ids_from(parse_document(text, parser), parser)
+
+def extract_paper(text: str, parser: str = "lxml"):
+    return paper_from(parse_document(text, parser), parser)
+
+def extract_author(text: str, parser: str = "lxml"):
+    return author_from(parse_document(text, parser), parser)
+
+def timed_extract(read, text: str, parser: str):
+    # Runs inline or in PARSE_POOL; returns the result with the parse and extract times.
+    start = time.perf_counter()
+    doc = parse_document(text, parser)
+    parsed = time.perf_counter()
+    result = read(doc, parser)
+    return result, parsed - start, time.perf_counter() - parsed
+
+async def parse_page(read, text: str, labels=None):
+    global PARSE_POOL, PAGE_PARSER
+    loop = asyncio.get_running_loop()
+    if profiling.METRICS is None:
+        if PARSE_POOL is None:
+            return read(parse_document(text, PAGE_PARSER), PAGE_PARSER)
+        return (await loop.run_in_executor(PARSE_POOL, timed_extract, read, text, PAGE_PARSER))[0]
+    labels = labels or {}
+    start = time.perf_counter()
+    if PARSE_POOL is None:
+        result, parse_seconds, extract_seconds = timed_extract(read, text, PAGE_PARSER)
+    else:
+        result, parse_seconds, extract_seconds = await loop.run_in_executor(PARSE_POOL, timed_extract, read, text, PAGE_PARSER)
+        profiling.METRICS.observe("parse_queue", time.perf_counter() - start - parse_seconds - extract_seconds, **labels)
+    profiling.METRICS.observe("parse", parse_seconds, **labels)
+    profiling.METRICS.observe("extract", extract_seconds, **labels)
+    return result
+
+@retry_on_server_disconnect(5)
+async def load_page(session: aiohttp.ClientSession, url: str, read, labels=None):
+    global REQUESTS_PBAR
+    if REQUESTS_PBAR is not None:
+        REQUESTS_PBAR.total += 1
+    text = await fetch_page_text(session, url, labels)
+    result = await parse_page(read, text, labels) if text is not None else None
+    if REQUESTS_PBAR is not None:
+        REQUESTS_PBAR.update()
+    return result
+
+async def load_paper_ids(session: aiohttp.ClientSession, url, labels=None):
+    return await load_page(session, url, paper_ids_from, labels) or []
+
+async def load_paper(session: aiohttp.ClientSession, url, labels=None):
+    return await load_page(session, url, paper_from, labels)
+
+async def load_author(session: aiohttp.ClientSession, url, labels=None):
+    return await load_page(session, url, author_from, labels)
+
+class AuthorResolver:
+    # Shared by every Conference.scrape task of a run. Speakers are remembered by
+    # host/year/speaker-id and by name/year, so an author who appears in several
+    # papers or conferences of a year is fetched once, and concurrent requests for
+    # the same speaker wait on a single in-flight fetch. Affiliations change over
+    # time, so each year is resolved from that year's speaker page.
+    VERSION = 2
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.fetched = 0
+        self.reused = 0
+        self._in_flight = {}
+        store = {}
+        if path is not None:
+            try:
+                with open(path, "r") as f:
+                    store = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        # Stores written before VERSION 2 keyed ids without the year; those entries are dropped.
+        self.by_id = store.get("ids", {}) if store.get("version") == self.VERSION else {}
+        self.by_name = store.get("names", {})
+
+    async def resolve(self, session: aiohttp.ClientSession, conference: "Conference", year: int, id: str, name: str):
+        id_key = f"{conference.host}/{year}/{id}"
+        name_key = f"{name}/{year}"
+        known = self.by_id.get(id_key)
+        # Guard against a speaker ID that was reused for someone else.
+        if known is not None and known[0] == name:
+            self.reused += 1
+            return tuple(known)
+        if name_key in self.by_name:
+            self.reused += 1
+            return name, self.by_name[name_key]
+
+        task = self._in_flight.get(id_key) or self._in_flight.get(name_key)
+        if task is not None:
+            self.reused += 1
+            return await task
+        task = asyncio.ensure_future(self._fetch(session, conference, year, id, id_key, name_key))
+        self._in_flight[id_key] = self._in_flight[name_key] = task
+        try:
+            return await task
+        finally:
+            self._in_flight.pop(id_key, None)
+            self._in_flight.pop(name_key, None)
+
+    async def _fetch(self, session, conference, year, id, id_key, name_key):
+        author = await load_author(session, conference.author_url(year, id), conference.metric_labels(year))
+        self.fetched += 1
+        if author is not None:
+            self.by_id[id_key] = list(author)
+            self.by_name[name_key] = author[1]
+        return author
+
+    def save(self):
+        if self.path is None:
+            return
+        with file_lock(f"{self.path}.lock"):
+            try:
+                with open(self.path, "r") as f:
+                    saved = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                saved = {}
+            if saved.get("version") == self.VERSION:
+                self.by_id = {**saved.get("ids", {}), **self.by_id}
+            self.by_name = {**saved.get("names", {}), **self.by_name}
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.VERSION, "ids": self.by_id, "names": self.by_name}, f)
+            os.replace(tmp_path, self.path)
+
+@dataclass
+class Conference:
+    name: str
+    host: str
+    first_year: int
+    # Replaces https://<host>, e.g. to scrape a local replay of the site (benchmarks/bench_scrape.py).
+    base_url: str = None
+
+    def root(self):
+        return self.base_url or f"https://{self.host}"
+
+    def metric_labels(self, year: int):
+        return {"host": self.host, "conference": f"{self.name} {year}"}
+
+    def papers_url(self, year: int):
+        return f"{self.root()}/Conferences/{year:d}/Schedule"
+
+    def paper_url(self, year: int, id: str):
+        return f"{self.root()}/Conferences/{year:d}/Schedule?showEvent={id}"
+
+    def author_url(self, year: int, id: str):
+        return f"{self.root()}/Conferences/{year:d}/Schedule?showSpeaker={id}"
+
+class ScrapeManifest:
+    # Sidecar of the output file recording which paper and speaker IDs each
+    # conference-year already contributed, so incremental scrapes can skip them.
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, "r") as f:
+                self.sections = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.sections = {}
+
+    @staticmethod
+    def path_for(output: str):
+        return f"{output}.manifest.json"
+
+    def section(self, conference: str, year: int):
+        return self.sections.setdefault(f"{conference}/{year}", {"papers": [], "speakers": {}})
+
+    def reset(self, conference: str, year: int):
+        self.sections.pop(f"{conference}/{year}", None)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.sections, f)
+        os.replace(tmp_path, self.path)
+
+class ScrapePipeline:
+    # Paper IDs flow listing -> paper fetching -> author resolution -> writer through
+    # bounded queues, so author fetches overlap with paper fetches and rows reach
+    # disk in batches. The manifest only records a paper once its rows are flushed,
+    # which makes it the checkpoint that --incremental resumes from.
+    def __init__(self, session: aiohttp.ClientSession, work, manifest: ScrapeManifest, store, workers: int, flush_rows: int):
+        self.session = session
+        self.work = work
+        self.manifest = manifest
+        self.store = store
+        self.workers = workers
+        self.flush_rows = flush_rows
+        self.flush_interval = 10
+        # The manifest holds every year's paper and speaker IDs, so rewriting it on every
+        # flush costs more as the dataset grows; it is saved at most this often and at the end.
+        self.manifest_interval = 30
+        self._manifest_saved = time.monotonic()
+        self.rows_written = 0
+        self.failed = 0
+
+    async def run(self):
+        paper_queue = asyncio.Queue(maxsize=self.workers * 2)
+        author_queue = asyncio.Queue(maxsize=self.workers * 2)
+        row_queue = asyncio.Queue(maxsize=self.workers * 2)
+
+        writer = asyncio.ensure_future(self._write_rows(row_queue))
+        paper_workers = [
+            asyncio.ensure_future(self._fetch_papers(paper_queue, author_queue))
+            for _ in range(self.workers)
+        ]
+        author_workers = [
+            asyncio.ensure_future(self._resolve_authors(author_queue, row_queue))
+            for _ in range(self.workers)
+        ]
+
+        async def produce():
+            await asyncio.gather(*(self._list_papers(paper_queue, *unit) for unit in self.work))
+            for _ in paper_workers:
+                await paper_queue.put(None)
+            await asyncio.gather(*paper_workers)
+            for _ in author_workers:
+                await author_queue.put(None)
+            await asyncio.gather(*author_workers)
+            await row_queue.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        tasks = [producer, writer, *paper_workers, *author_workers]
+        try:
+            # A failed writer stops draining row_queue, which would leave the author
+            # workers blocked on it for good, so it is watched alongside the producers.
+            await asyncio.wait([producer, writer], return_when=asyncio.FIRST_EXCEPTION)
+            if writer.done():
+                writer.result()
+            await producer
+            await writer
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _list_papers(self, paper_queue: asyncio.Queue, conf: "Conference", year: int, paper_ids=None):
+        # Work items are (conference, year), or (conference, year, paper IDs) for part of a year.
+        seen = set(self.manifest.section(conf.name, year)["papers"])
+        if paper_ids is None:
+            try:
+                paper_ids = await load_paper_ids(self.session, conf.papers_url(year), conf.metric_labels(year))
+            except Exception as e:
+                print(f"Could not list papers of {conf.name} {year}: {e}")
+                self.failed += 1
+                return
+        for id in paper_ids:
+            if id not in seen:
+                await paper_queue.put((conf, year, id))
+
+    async def _fetch_papers(self, paper_queue: asyncio.Queue, author_queue: asyncio.Queue):
+        while (item := await paper_queue.get()) is not None:
+            conf, year, id = item
+            try:
+                paper = await load_paper(self.session, conf.paper_url(year, id), conf.metric_labels(year))
+            except Exception:
+                self.failed += 1
+                continue
+            if paper is not None:
+                await author_queue.put((conf, year, id, paper))
+
+    async def _resolve_authors(self, author_queue: asyncio.Queue, row_queue: asyncio.Queue):
+        resolver = AUTHOR_RESOLVER or AuthorResolver()
+        while (item := await author_queue.get()) is not None:
+            conf, year, id, (title, authors) = item
+            speakers = self.manifest.section(conf.name, year)["speakers"]
+            try:
+                resolved = await asyncio.gather(*(
+                    self._resolve_author(resolver, speakers, conf, year, speaker_id, name)
+                    for name, speaker_id in authors
+                ))
+            except Exception:
+                self.failed += 1
+                continue
+            affiliations = dict(author for author in resolved if author is not None)
+            rows = [
+                (conf.name, year, title, name, affiliations.get(name, "n/a"))
+                for name, _ in authors
+            ]
+            await row_queue.put((conf.name, year, id, rows))
+
+    async def _resolve_author(self, resolver: "AuthorResolver", speakers, conf: "Conference", year: int, speaker_id: str, name: str):
+        if speaker_id in speakers:
+            return tuple(speakers[speaker_id])
+        author = await resolver.resolve(self.session, conf, year, speaker_id, name)
+        if author is not None:
+            speakers[speaker_id] = list(author)
+        return author
+
+    async def _write_rows(self, row_queue: asyncio.Queue):
+        rows, done = [], []
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(row_queue.get(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    self._flush(rows, done)
+                    rows, done = [], []
+                    continue
+                if item is None:
+                    break
+                conference, year, id, paper_rows = item
+                rows.extend(paper_rows)
+                done.append((conference, year, id))
+                if len(rows) >= self.flush_rows:
+                    self._flush(rows, done)
+                    rows, done = [], []
+            self._flush(rows, done)
+        finally:
+            # Only papers whose rows were flushed are recorded, so this is safe on failure too.
+            self.manifest.save()
+
+    def _flush(self, rows, done):
+        if not done:
+            return
+        if rows:
+            self.store.append(pd.DataFrame(rows, columns=PAPER_COLUMNS))
+            self.rows_written += len(rows)
+        for conference, year, id in done:
+            self.manifest.section(conference, year)["papers"].append(id)
+        # Papers flushed since the last save are fetched again by an interrupted run's
+        # --incremental resume; the deduplication at the end of the scrape drops their rows.
+        if time.monotonic() - self._manifest_saved >= self.manifest_interval:
+            self.manifest.save()
+            self._manifest_saved = time.monotonic()
+
+CONFERENCES = [
+    Conference("ICML", "icml.cc", 2017),
+    Conference("NeurIPS", "neurips.cc", 2006),
+    Conference("ICLR", "iclr.cc", 2018),
+]
+
+def setup_scraping(args, parallel: int, parse_workers: int):
+    # Module state shared by every request of a scrape process.
+    global REQUEST_SCHEDULER, RESPONSE_CACHE, AUTHOR_RESOLVER, PARSE_POOL, PAGE_PARSER
+    REQUEST_SCHEDULER = RequestScheduler(min(parallel, 32), parallel)
+    if args.cache_dir:
+        RESPONSE_CACHE = ResponseCache(
+            args.cache_dir,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            fresh_ttl=args.cache_ttl * 60 * 60,
+            offline=args.offline,
+        )
+    PAGE_PARSER = args.parser
+    if parse_workers > 0:
+        PARSE_POOL = ProcessPoolExecutor(max_workers=parse_workers)
+    AUTHOR_RESOLVER = AuthorResolver(
+        os.path.join(args.cache_dir, "authors.json") if args.cache_dir else None
+    )
+
+def finish_scraping():
+    global PARSE_POOL
+    if RESPONSE_CACHE is not None:
+        RESPONSE_CACHE.save()
+    AUTHOR_RESOLVER.save()
+    if PARSE_POOL is not None:
+        PARSE_POOL.shutdown()
+        PARSE_POOL = None
+
+def client_session(parallel: int):
+    timeout = aiohttp.ClientTimeout(total=60 * 5)
+    connector = aiohttp.TCPConnector(
+        limit=parallel,
+        limit_per_host=parallel,
+        ttl_dns_cache=60 * 10,
+        enable_cleanup_closed=True,
+    )
+    trace_configs = [record_trace_config()] if profiling.METRICS is not None else None
+    return aiohttp.ClientSession(timeout=timeout, connector=connector, trace_configs=trace_configs)
+
+async def scrape_in_process(args, work, store, manifest: ScrapeManifest):
+    global REQUESTS_PBAR
+    setup_scraping(args, args.parallel, args.parse_workers)
+    with tqdm(total=0, desc="Overall Progress") as pbar:
+        REQUESTS_PBAR = pbar
+        async with client_session(args.parallel) as session:
+            pipeline = ScrapePipeline(session, work, manifest, store, args.parallel, args.flush_rows)
+            try:
+                await pipeline.run()
+            finally:
+                finish_scraping()
+
+    if RESPONSE_CACHE is not None:
+        cache = RESPONSE_CACHE
+        print(f"Cache: {cache.hits} hits, {cache.revalidated} revalidated, {cache.misses} misses")
+    if REQUEST_SCHEDULER.hosts:
+        print(f"Hosts: {REQUEST_SCHEDULER.summary()}")
+    print(f"Authors: {AUTHOR_RESOLVER.fetched} speaker pages fetched, {AUTHOR_RESOLVER.reused} resolved without a fetch")
+    return pipeline.rows_written, pipeline.failed
+
+def parse_years(years: str):
+    if "-" in years:
+        match = re.match(r"^(\d+)-(\d+)", years)
+        if not match:
+            return None
+        return int(match[1]), int(match[2])
+    return int(years), int(years)
+
+async def scrape_mode(args):
+    output = args.output
+    if args.offline and not args.cache_dir:
+        print("Error: --offline requires a --cache-dir to read pages from.")
+        return
+    years = parse_years(args.years)
+    if years is None:
+        print(f"Error: Invalid year range {args.years}; expected e.g. 2008-2010")
+        return
+    start, end = years
+    year_range = range(start, end + 1)
+
+    store = open_paper_store(output)
+    manifest = ScrapeManifest(ScrapeManifest.path_for(output))
+    work = [
+        (conf, year)
+        for conf in CONFERENCES
+        for year in year_range
+        if year >= conf.first_year
+    ]
+    if not args.incremental:
+        for conf, year in work:
+            manifest.reset(conf.name, year)
+
+    cf_names = ", ".join(c.name for c in CONFERENCES)
+    mode = "Incrementally scraping" if args.incremental else "Scraping"
+    print(f"{mode} papers from {start}-{end} in {cf_names} into {output}")
+
+    total = None
+    try:
+        if args.workers > 1:
+            from shards import sharded_scrape
+            rows_written, failed = await sharded_scrape(args, work, store, manifest)
+        else:
+            rows_written, failed = await scrape_in_process(args, work, store, manifest)
+    finally:
+        # Rows are appended as they arrive; a full re-scrape of a year may repeat rows
+        # already on disk, so they are dropped even when the scrape is interrupted.
+        if store.exists():
+            total = store.deduplicate(
+                ["Conference", "Year", "Title", "Author"],
+                partitions=[(conf.name, year) for conf, year in work],
+            )
+    if failed:
+        print(f"Warning: {failed} pages could not be scraped; rerun with --incremental to retry them.")
+
+    if total is not None:
+        print(f"\nSuccessfully saved data to {output}")
+        print(f"New entries: {rows_written}")
+        print(f"Total entries: {total}")
+        entities = EntityIndex.load_or_build(EntityIndex.path_for(output), store.fingerprint(), store.read())
+        print(f"Entities: {entities.summary()}")
@@ -0,0 +1,412 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import time
+
+import pandas as pd
+from tqdm import tqdm
+
+import profiling
+import scrape
+from storage import PAPER_COLUMNS, open_store
+
+# A unit whose worker stops renewing its lease for this long is claimed again.
+LEASE_SECONDS = 60
+# Claims of a unit before it is given up on, e.g. a year whose listing keeps failing.
+MAX_ATTEMPTS = 3
+# Replacement processes started per worker for workers that exit abnormally.
+MAX_RESTARTS = 3
+DEDUPLICATE_COLUMNS = ["Conference", "Year", "Title", "Author"]
+
+def process_alive(pid: int):
+    if os.name != "posix":
+        # os.kill() would terminate the process on Windows; leases expire instead.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class WorkQueue:
+    # Durable queue of the units of a sharded scrape, shared by its worker processes
+    # through SQLite. A unit starts as a whole conference-year (part -1); the worker
+    # that lists a year with more than --shard-papers papers splits it into parts of
+    # that many paper IDs for any worker to claim. Claims hold a lease the worker
+    # keeps renewing, so the units of a worker that crashed or hung go back to the
+    # queue once the lease runs out.
+    def __init__(self, path: str, lease_seconds: float = LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS units ("
+            "id INTEGER PRIMARY KEY, conference TEXT NOT NULL, year INTEGER NOT NULL, part INTEGER NOT NULL, "
+            "papers TEXT, state TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_until REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, rows INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, "
+            "error TEXT, UNIQUE (conference, year, part))"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS speakers (key TEXT PRIMARY KEY, name TEXT, affiliation TEXT)")
+
+    def add(self, work):
+        self.db.executemany(
+            "INSERT OR IGNORE INTO units (conference, year, part) VALUES (?, ?, -1)",
+            [(conf.name, year) for conf, year in work],
+        )
+
+    def retain(self, work):
+        # Drops units of conference-years that are not part of this run.
+        keep = {(conf.name, year) for conf, year in work}
+        stale = [
+            (conference, year)
+            for conference, year in self.db.execute("SELECT DISTINCT conference, year FROM units")
+            if (conference, year) not in keep
+        ]
+        self.db.executemany("DELETE FROM units WHERE conference = ? AND year = ?", stale)
+
+    def retry_failed(self):
+        # Failed units and units with pages that could not be scraped run again on resume.
+        return self.db.execute(
+            "UPDATE units SET state = 'pending', attempts = 0, failed = 0, error = NULL "
+            "WHERE state = 'failed' OR (state = 'done' AND failed > 0)"
+        ).rowcount
+
+    def claim(self, worker: str):
+        # (id, conference, year, part, paper IDs or None for a whole year), or None.
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute(
+                "UPDATE units SET state = 'failed', error = 'lease expired' "
+                "WHERE state = 'claimed' AND lease_until < ? AND attempts >= ?",
+                (now, MAX_ATTEMPTS),
+            )
+            row = self.db.execute(
+                "SELECT id, conference, year, part, papers FROM units "
+                "WHERE state = 'pending' OR (state = 'claimed' AND lease_until < ?) ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                self.db.execute(
+                    "UPDATE units SET state = 'claimed', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + self.lease_seconds, row[0]),
+                )
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        id, conference, year, part, papers = row
+        return id, conference, year, part, json.loads(papers) if papers is not None else None
+
+    def renew(self, worker: str):
+        self.db.execute(
+            "UPDATE units SET lease_until = ? WHERE worker = ? AND state = 'claimed'",
+            (time.time() + self.lease_seconds, worker),
+        )
+
+    def split(self, id: int, worker: str, parts):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            conference, year = self.db.execute("SELECT conference, year FROM units WHERE id = ?", (id,)).fetchone()
+            self.db.executemany(
+                "INSERT OR IGNORE INTO units (conference, year, part, papers) VALUES (?, ?, ?, ?)",
+                [(conference, year, part, json.dumps(papers)) for part, papers in enumerate(parts)],
+            )
+            self.db.execute("UPDATE units SET state = 'split' WHERE id = ? AND worker = ?", (id, worker))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def complete(self, id: int, worker: str, rows: int, failed: int):
+        # A worker that lost its lease still records its result; the rows it wrote
+        # are deduplicated against the other claimant's when the shards are merged.
+        self.db.execute(
+            "UPDATE units SET state = 'done', rows = ?, failed = ?, error = NULL WHERE id = ? AND state != 'split'",
+            (rows, failed, id),
+        )
+
+    def fail(self, id: int, worker: str, error: str):
+        self.db.execute(
+            "UPDATE units SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, worker = NULL, error = ? "
+            "WHERE id = ? AND worker = ? AND state = 'claimed'",
+            (MAX_ATTEMPTS, error, id, worker),
+        )
+
+    def release(self, worker: str):
+        # Units of a worker process that exited abnormally; no need to wait for their leases.
+        return self.db.execute(
+            "UPDATE units SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, worker = NULL, "
+            "error = 'worker exited' WHERE worker = ? AND state = 'claimed'",
+            (MAX_ATTEMPTS, worker),
+        ).rowcount
+
+    def speaker(self, key: str):
+        return self.db.execute("SELECT name, affiliation FROM speakers WHERE key = ?", (key,)).fetchone()
+
+    def add_speaker(self, key: str, author):
+        self.db.execute("INSERT OR REPLACE INTO speakers (key, name, affiliation) VALUES (?, ?, ?)", (key, *author))
+
+    def release_orphans(self):
+        # Claims left behind by the workers of an interrupted run. Workers are
+        # named "<index>:<pid>"; claims of live processes keep their lease.
+        released = 0
+        for (worker,) in self.db.execute("SELECT DISTINCT worker FROM units WHERE state = 'claimed'").fetchall():
+            if not process_alive(int(worker.rpartition(":")[2])):
+                released += self.release(worker)
+        return released
+
+    def counts(self):
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM units GROUP BY state"))
+
+    def remaining(self):
+        return self.db.execute("SELECT COUNT(*) FROM units WHERE state IN ('pending', 'claimed')").fetchone()[0]
+
+    def totals(self):
+        rows, failed = self.db.execute("SELECT COALESCE(SUM(rows), 0), COALESCE(SUM(failed), 0) FROM units").fetchone()
+        return rows, failed
+
+    def failures(self):
+        return self.db.execute(
+            "SELECT conference, year, part, error FROM units WHERE state = 'failed' ORDER BY conference, year, part"
+        ).fetchall()
+
+    def close(self):
+        self.db.close()
+
+class SharedAuthorResolver(scrape.AuthorResolver):
+    # Speakers resolved by any worker of the run are shared through the queue
+    # database, so a speaker with papers in parts of a year that different workers
+    # scrape is fetched once.
+    def __init__(self, path: str, queue: WorkQueue):
+        super().__init__(path)
+        self.queue = queue
+
+    async def _fetch(self, session, conference, year, id, id_key, name_key):
+        shared = self.queue.speaker(name_key)
+        if shared is not None:
+            self.reused += 1
+            self.by_id[id_key] = list(shared)
+            self.by_name[name_key] = shared[1]
+            return tuple(shared)
+        author = await super()._fetch(session, conference, year, id, id_key, name_key)
+        if author is not None:
+            self.queue.add_speaker(name_key, author)
+        return author
+
+def shard_path(shards_dir: str, index: int):
+    return os.path.join(shards_dir, f"shard-{index}.csv")
+
+async def renew_leases(queue: WorkQueue, worker: str):
+    while True:
+        await asyncio.sleep(queue.lease_seconds / 4)
+        queue.renew(worker)
+
+async def scrape_unit(session, queue: WorkQueue, worker: str, unit, pipeline_args):
+    id, conference, year, part, papers = unit
+    conf = next(c for c in scrape.CONFERENCES if c.name == conference)
+    store, manifest, parallel, flush_rows, shard_papers = pipeline_args
+    if papers is None:
+        papers = await scrape.load_paper_ids(session, conf.papers_url(year), conf.metric_labels(year))
+        if len(papers) > shard_papers:
+            queue.split(id, worker, [papers[i:i + shard_papers] for i in range(0, len(papers), shard_papers)])
+            return
+    pipeline = scrape.ScrapePipeline(session, [(conf, year, papers)], manifest, store, parallel, flush_rows)
+    await pipeline.run()
+    queue.complete(id, worker, pipeline.rows_written, pipeline.failed)
+    return pipeline.rows_written
+
+async def run_shard(index: int, args, shards_dir: str, parallel: int):
+    worker = f"{index}:{os.getpid()}"
+    queue = WorkQueue(os.path.join(shards_dir, "queue.db"))
+    scrape.setup_scraping(args, parallel, 0)
+    scrape.AUTHOR_RESOLVER = SharedAuthorResolver(scrape.AUTHOR_RESOLVER.path, queue)
+    store = open_store(shard_path(shards_dir, index))
+    manifest = scrape.ScrapeManifest(scrape.ScrapeManifest.path_for(store.path))
+    # Incremental runs skip the papers the output already has, as recorded in its manifest.
+    seed = scrape.ScrapeManifest(scrape.ScrapeManifest.path_for(args.output)) if args.incremental else None
+    pipeline_args = (store, manifest, parallel, args.flush_rows, args.shard_papers)
+    units = rows = 0
+
+    renewer = asyncio.ensure_future(renew_leases(queue, worker))
+    try:
+        async with scrape.client_session(parallel) as session:
+            while True:
+                unit = queue.claim(worker)
+                if unit is None:
+                    # Units claimed by other workers may still be split or given back.
+                    if not queue.remaining():
+                        break
+                    await asyncio.sleep(1)
+                    continue
+                _, conference, year, _, _ = unit
+                key = f"{conference}/{year}"
+                if seed is not None and key in seed.sections and key not in manifest.sections:
+                    manifest.sections[key] = {
+                        "papers": list(seed.sections[key]["papers"]),
+                        "speakers": dict(seed.sections[key]["speakers"]),
+                    }
+                started = time.perf_counter()
+                try:
+                    written = await scrape_unit(session, queue, worker, unit, pipeline_args)
+                except Exception as e:
+                    print(f"Worker {index} could not scrape {conference} {year}: {e}")
+                    queue.fail(unit[0], worker, str(e))
+                    continue
+                if written is not None:
+                    units += 1
+                    rows += written
+                    if profiling.METRICS is not None:
+                        profiling.METRICS.observe("unit", time.perf_counter() - started, conference=f"{conference} {year}")
+    finally:
+        renewer.cancel()
+        scrape.finish_scraping()
+        queue.close()
+
+    cache = scrape.RESPONSE_CACHE
+    cache_text = f", cache {cache.hits} hits/{cache.misses} misses" if cache is not None else ""
+    print(f"Worker {index}: {units} units, {rows} rows{cache_text}, {scrape.AUTHOR_RESOLVER.fetched} speaker pages fetched")
+
+def run_worker(index: int, args, conferences, shards_dir: str, parallel: int, profile: bool):
+    # Entry point of a worker process. Conferences are passed along so their
+    # base URLs (see benchmarks/bench_scrape.py) survive the spawn.
+    scrape.CONFERENCES[:] = conferences
+    if profile:
+        profiling.METRICS = profiling.Metrics()
+    try:
+        asyncio.run(run_shard(index, args, shards_dir, parallel))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if profiling.METRICS is not None:
+            with open(os.path.join(shards_dir, f"metrics-{index}-{os.getpid()}.json"), "w") as f:
+                json.dump(profiling.METRICS.to_json(), f)
+
+def merge_shards(shards_dir: str, store, manifest: "scrape.ScrapeManifest"):
+    # Appends the rows of every shard to the output and folds the shard manifests
+    # into the output's. A unit re-claimed after a crash can have rows in two
+    # shards; those are dropped here, and repeats of rows already in the output
+    # by scrape_mode's deduplication.
+    frames = []
+    for name in sorted(os.listdir(shards_dir)):
+        if not (name.startswith("shard-") and name.endswith(".csv")):
+            continue
+        path = os.path.join(shards_dir, name)
+        shard_store = open_store(path)
+        if shard_store.exists() and os.path.getsize(path):
+            frames.append(shard_store.read())
+        shard_manifest = scrape.ScrapeManifest(scrape.ScrapeManifest.path_for(path))
+        for key, section in shard_manifest.sections.items():
+            merged = manifest.sections.setdefault(key, {"papers": [], "speakers": {}})
+            merged["papers"] = list(dict.fromkeys(merged["papers"] + section["papers"]))
+            merged["speakers"].update(section["speakers"])
+
+    rows = pd.concat(frames, ignore_index=True).drop_duplicates(DEDUPLICATE_COLUMNS) if frames else pd.DataFrame(columns=PAPER_COLUMNS)
+    if len(rows):
+        store.append(rows[PAPER_COLUMNS])
+    manifest.save()
+    for name in os.listdir(shards_dir):
+        if name.startswith("shard-"):
+            os.remove(os.path.join(shards_dir, name))
+    return len(rows)
+
+def merge_metrics(shards_dir: str):
+    for name in sorted(os.listdir(shards_dir)):
+        if name.startswith("metrics-") and name.endswith(".json"):
+            path = os.path.join(shards_dir, name)
+            if profiling.METRICS is not None:
+                with open(path, "r") as f:
+                    profiling.METRICS.merge_json(json.load(f))
+            os.remove(path)
+
+async def sharded_scrape(args, work, store, manifest: "scrape.ScrapeManifest"):
+    # Runs --workers processes, each with its own event loop, connection pool and
+    # shard of the output, pulling units from a WorkQueue in <output>.shards/.
+    # The queue outlives an interrupted run: --incremental picks it up again.
+    shards_dir = f"{args.output}.shards"
+    if not args.incremental:
+        shutil.rmtree(shards_dir, ignore_errors=True)
+    os.makedirs(shards_dir, exist_ok=True)
+    queue = WorkQueue(os.path.join(shards_dir, "queue.db"))
+    queue.retain(work)
+    queue.release_orphans()
+    already_done = queue.counts().get("done", 0)
+    if already_done:
+        print(f"Resuming the sharded scrape in {shards_dir}: {already_done} units already done.")
+    queue.retry_failed()
+    queue.add(work)
+
+    parallel = max(1, args.parallel // args.workers)
+    print(f"Scraping with {args.workers} worker processes, up to {parallel} parallel requests each.")
+    context = multiprocessing.get_context("spawn")
+    conferences = list(scrape.CONFERENCES)
+
+    def start(index):
+        process = context.Process(
+            target=run_worker,
+            args=(index, args, conferences, shards_dir, parallel, profiling.METRICS is not None),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    processes = {index: start(index) for index in range(args.workers)}
+    restarts = 0
+    finished_at = None
+    try:
+        with tqdm(total=0, desc="Units") as pbar:
+            while processes:
+                await asyncio.sleep(0.5)
+                counts = queue.counts()
+                pbar.total = sum(n for state, n in counts.items() if state != "split")
+                pbar.n = counts.get("done", 0) + counts.get("failed", 0)
+                pbar.refresh()
+                for index, process in list(processes.items()):
+                    if process.is_alive():
+                        continue
+                    del processes[index]
+                    if process.exitcode:
+                        released = queue.release(f"{index}:{process.pid}")
+                        print(f"Worker {index} exited with status {process.exitcode}; {released} of its units are back in the queue.")
+                        if queue.remaining() and restarts < MAX_RESTARTS * args.workers:
+                            restarts += 1
+                            processes[index] = start(index)
+                # A hung worker never notices the queue is empty; its units were re-claimed by now.
+                if queue.remaining():
+                    finished_at = None
+                elif finished_at is None:
+                    finished_at = time.monotonic()
+                elif time.monotonic() - finished_at > LEASE_SECONDS:
+                    break
+    except asyncio.CancelledError:
+        print(f"\nInterrupted; rerun with --incremental to resume from {shards_dir}.")
+        raise
+    finally:
+        for process in processes.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    merge_metrics(shards_dir)
+    with profiling.stage_timer("merge"):
+        rows_written = merge_shards(shards_dir, store, manifest)
+    _, failed_pages = queue.totals()
+    failures = queue.failures()
+    unfinished = queue.remaining()
+    queue.close()
+    for conference, year, part, error in failures:
+        print(f"Could not scrape {conference} {year}{f' part {part + 1}' if part >= 0 else ''}: {error}")
+    if unfinished or failures:
+        print(f"{unfinished + len(failures)} units are not done; rerun with --incremental to resume from {shards_dir}.")
+    else:
+        shutil.rmtree(shards_dir, ignore_errors=True)
+    return rows_written, failed_pages
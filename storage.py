@@ -0,0 +1,200 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+
+PAPER_COLUMNS = ["Conference", "Year", "Title", "Author", "Affiliation"]
+PAPER_PARTITIONS = ["Conference", "Year"]
+PAPER_CATEGORIES = ["Conference", "Author", "Affiliation"]
+# The strings pd.read_csv treats as missing by default, e.g. "n/a" and "". Both
+# stores read with this set explicitly, so they agree on any pandas version.
+CSV_NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+class CsvStore:
+    # na_values replaces pandas' default NA strings when given, e.g. [""] so that
+    # "n/a" placeholders are read back as text rather than as missing values.
+    def __init__(self, path: str, partition_cols=None, categories=None, na_values=None):
+        self.path = path
+        self.partition_cols = partition_cols or []
+        self.categories = categories or []
+        self.na_values = na_values
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def fingerprint(self):
+        stat = os.stat(self.path)
+        return [(os.path.basename(self.path), stat.st_size, stat.st_mtime_ns)]
+
+    def read(self):
+        na_values = CSV_NA_VALUES if self.na_values is None else self.na_values
+        return pd.read_csv(
+            self.path, dtype={c: "category" for c in self.categories}, keep_default_na=False, na_values=na_values
+        )
+
+    def write(self, df: pd.DataFrame):
+        df.to_csv(self.path, index=False)
+
+    def append(self, df: pd.DataFrame):
+        write_header = not self.exists() or os.path.getsize(self.path) == 0
+        df.to_csv(self.path, mode="a", header=write_header, index=False)
+
+    def deduplicate(self, subset, partitions=None):
+        df = self.read()
+        n_rows = len(df)
+        df = df.drop_duplicates(subset=subset, keep="first")
+        if len(df) != n_rows:
+            self.write(df)
+        return len(df)
+
+class ParquetStore:
+    # A directory of Parquet files partitioned by `partition_cols` (hive layout,
+    # e.g. papers.parquet/Conference=ICML/Year=2023/part-*.parquet). Appends add
+    # new files to the affected partitions without touching the others.
+    def __init__(self, path: str, partition_cols=None, categories=None, na_values=None):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Error: Parquet storage requires pyarrow (pip install pyarrow).")
+        self.path = path
+        self.partition_cols = partition_cols or []
+        self.categories = categories or []
+        self.csv_path = f"{os.path.splitext(path)[0]}.csv"
+        # Parquet keeps strings as written; only the CSV import below parses NA values.
+        self.na_values = na_values
+
+    def exists(self):
+        return os.path.isdir(self.path) and any(
+            name.endswith(".parquet") for _, _, names in os.walk(self.path) for name in names
+        )
+
+    def fingerprint(self):
+        files = []
+        for root, _, names in os.walk(self.path):
+            for name in names:
+                stat = os.stat(os.path.join(root, name))
+                files.append((os.path.relpath(os.path.join(root, name), self.path), stat.st_size, stat.st_mtime_ns))
+        return sorted(files)
+
+    def read(self):
+        if not self.exists():
+            if not os.path.exists(self.csv_path):
+                raise FileNotFoundError(self.path)
+            # First use of a Parquet store next to an existing CSV of the same name imports it.
+            print(f"Importing '{self.csv_path}' into '{self.path}'...")
+            self.append(CsvStore(self.csv_path, na_values=self.na_values).read())
+        return self._read_table(self.path)
+
+    def read_partition(self, values):
+        df = self._read_table(self._partition_path(values))
+        for col, value in zip(self.partition_cols, values):
+            df[col] = value
+        return self._normalize(df)
+
+    def write(self, df: pd.DataFrame):
+        self._replace(self.path, df, self.partition_cols)
+
+    def append(self, df: pd.DataFrame):
+        self._write_files(df, self.path, self.partition_cols)
+
+    def _write_files(self, df: pd.DataFrame, path: str, partition_cols):
+        if df.empty:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        # Categoricals are written as plain strings: a pandas categorical would store its
+        # full category list in every partition file. Parquet dictionary-encodes them anyway.
+        df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_to_dataset(
+            table,
+            path,
+            partition_cols=partition_cols or None,
+            basename_template=f"part-{time.time_ns()}-{{i}}.parquet",
+        )
+
+    def _replace(self, path: str, df: pd.DataFrame, partition_cols):
+        # The replacement is written to a staging directory next to the dataset and
+        # renamed into place only once complete, so a crash while writing leaves the
+        # old files untouched. The old directory is moved aside before it is deleted.
+        suffix = time.time_ns()
+        staging = f"{self.path}.tmp-{suffix}"
+        os.makedirs(staging)
+        try:
+            self._write_files(df, staging, partition_cols)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        retired = f"{self.path}.old-{suffix}"
+        if os.path.exists(path):
+            os.rename(path, retired)
+        os.rename(staging, path)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def deduplicate(self, subset, partitions=None):
+        if partitions is None or not self.partition_cols:
+            df = self.read().drop_duplicates(subset=subset, keep="first")
+            self.write(df)
+            return len(df)
+        for values in partitions:
+            path = self._partition_path(values)
+            if not os.path.isdir(path):
+                continue
+            part = self.read_partition(values)
+            deduplicated = part.drop_duplicates(subset=subset, keep="first")
+            if len(os.listdir(path)) > 1 or len(deduplicated) != len(part):
+                # Partition values live in the directory names, not in the files.
+                self._replace(path, deduplicated.drop(columns=self.partition_cols), [])
+        return len(self.read())
+
+    def _read_table(self, path: str):
+        import pyarrow.parquet as pq
+        dictionary_cols = [c for c in self.categories if c not in self.partition_cols]
+        return self._normalize(pq.read_table(path, read_dictionary=dictionary_cols).to_pandas())
+
+    def _partition_path(self, values):
+        return os.path.join(self.path, *(f"{col}={value}" for col, value in zip(self.partition_cols, values)))
+
+    def _normalize(self, df: pd.DataFrame):
+        # Placeholders such as "n/a" and "" are stored as written; they are read back as
+        # missing values, exactly as CsvStore.read parses them, so both stores return the
+        # same frame whether the rows were scraped or imported from a CSV.
+        na_values = CSV_NA_VALUES if self.na_values is None else set(self.na_values)
+        for col in df.columns:
+            values = df[col]
+            if col in self.partition_cols:
+                continue
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                missing = [value for value in values.cat.categories if value in na_values]
+                if missing:
+                    df[col] = values.cat.remove_categories(missing)
+            elif values.dtype == object:
+                df[col] = values.mask(values.isin(na_values))
+        for col in df.columns:
+            if col in self.categories:
+                df[col] = df[col].astype("category")
+            elif isinstance(df[col].dtype, pd.CategoricalDtype):
+                # Partition columns come back as categoricals of their (possibly numeric) values.
+                df[col] = df[col].astype(df[col].cat.categories.dtype)
+        columns = [c for c in PAPER_COLUMNS if c in df.columns]
+        return df[columns + [c for c in df.columns if c not in columns]]
+
+def open_store(path: str, partition_cols=None, categories=None, na_values=None):
+    store_class = ParquetStore if path.endswith(".parquet") else CsvStore
+    return store_class(path, partition_cols=partition_cols, categories=categories, na_values=na_values)
+
+def open_paper_store(path: str):
+    return open_store(path, partition_cols=PAPER_PARTITIONS, categories=PAPER_CATEGORIES)
+
+async def convert_mode(args):
+    try:
+        df = open_paper_store(args.output).read()
+    except FileNotFoundError:
+        print(f"Error: The file '{args.output}' was not found.")
+        return
+    open_paper_store(args.to).write(df)
+    print(f"Converted {len(df)} entries from '{args.output}' to '{args.to}'.")
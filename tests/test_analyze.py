@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from analyze import PaperIndex
+from entities import EntityIndex
+
+def test_rows_without_a_title_belong_to_no_paper():
+    df = pd.DataFrame({
+        "Conference": ["ICML", "ICML", "ICML"],
+        "Year": [2023, 2023, 2023],
+        "Title": ["Paper A", np.nan, "Paper A"],
+        "Author": ["Ann Lee", "Bo Chen", "Bo Chen"],
+        "Affiliation": ["MIT", "MIT", "MIT"],
+    })
+    index = PaperIndex(df)
+    assert list(index.paper_codes) == [0, -1, 0]
+    assert list(index.paper_titles()) == ["Paper A"]
+    # The untitled row still counts towards its author.
+    assert dict(zip(index.author_names, index.paper_counts)) == {"Ann Lee": 1, "Bo Chen": 2}
+
+def test_institution_queries_match_secondary_affiliations():
+    df = pd.DataFrame({
+        "Conference": ["ICML", "ICML", "ICML"],
+        "Year": [2023, 2023, 2023],
+        "Title": ["Paper A", "Paper A", "Paper B"],
+        "Author": ["Ann Lee", "Bo Chen", "Cy Diaz"],
+        "Affiliation": ["Stanford University/Pinterest", "Stanford University", "MIT"],
+    })
+    index = PaperIndex(df, EntityIndex(df))
+    assert list(index.affiliation_names[index.affiliations_named("Pinterest")]) == ["Stanford University"]
+    author_ids, _ = index.top_authors(10, index.affiliations_named("Pinterest"))
+    assert "Ann Lee" in set(index.author_names[author_ids])
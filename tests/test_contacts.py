@@ -0,0 +1,30 @@
+import asyncio
+
+from contacts import ContactStore, SearchProvider, get_contacts
+
+class FixedSearchProvider(SearchProvider):
+    def __init__(self, contact_urls):
+        self.contact_urls = contact_urls
+
+    async def search(self, query: str, num_results: int):
+        if query.endswith("google scholar"):
+            return ["https://scholar.google.com/citations?user=abc"]
+        return self.contact_urls
+
+def look_up(store, contact_urls):
+    return asyncio.run(get_contacts([("Ann Lee", "MIT")], 1, FixedSearchProvider(contact_urls), store))[0]
+
+def test_failed_email_lookup_is_not_cached(tmp_path):
+    store = ContactStore(str(tmp_path / "contacts.db"))
+    # Nothing listens on port 9, so every candidate page fails to load.
+    contact = look_up(store, ["http://127.0.0.1:9/ann"])
+    assert contact["Email"] == "n/a"
+    fresh = store.fresh_fields("Ann Lee", "MIT")
+    assert "Email" not in fresh
+    assert fresh["Website"] == "http://127.0.0.1:9/ann"
+    assert fresh["Google Scholar"] == "https://scholar.google.com/citations?user=abc"
+
+def test_empty_email_lookup_is_cached(tmp_path):
+    store = ContactStore(str(tmp_path / "contacts.db"))
+    look_up(store, [])
+    assert store.fresh_fields("Ann Lee", "MIT")["Email"] == "n/a"
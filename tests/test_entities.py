@@ -0,0 +1,18 @@
+import pandas as pd
+
+from entities import EntityIndex
+
+def test_missing_affiliations_do_not_resolve_to_an_institution():
+    df = pd.DataFrame({
+        "Author": ["John Smith", "J. Smith", "Jane Doe", "J. Doe", "Ann Lee", "A. Lee"],
+        "Affiliation": ["n/a", "n/a", "", " ", "MIT", "Massachusetts Institute of Technology"],
+    })
+    entities = EntityIndex(df)
+    codes = entities.affiliation_codes(df["Affiliation"])
+    assert list(codes[:4]) == [-1, -1, -1, -1]
+    assert codes[4] == codes[5] >= 0
+    assert list(entities.affiliation_names) == ["MIT"]
+    # Without a shared institution the name variants stay apart.
+    authors = entities.author_codes(df["Author"])
+    assert authors[0] != authors[1] and authors[2] != authors[3]
+    assert authors[4] == authors[5]
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import datetime
+import json
+
+import pandas as pd
+import pytest
+
+import scrape
+from scrape import AuthorResolver, Conference
+
+AFFILIATIONS = {2023: "MIT", 2024: "Stanford University"}
+
+def test_speaker_is_resolved_per_year(tmp_path, monkeypatch):
+    fetched = []
+
+    async def load_author(session, url, labels=None):
+        year = int(url.split("/Conferences/")[1].split("/")[0])
+        fetched.append(year)
+        return "Ann Lee", AFFILIATIONS[year]
+
+    monkeypatch.setattr(scrape, "load_author", load_author)
+    conference = Conference("ICML", "icml.cc", 2017)
+    path = str(tmp_path / "authors.json")
+
+    async def resolve_all(resolver):
+        return [await resolver.resolve(None, conference, year, "42", "Ann Lee") for year in (2023, 2024, 2023)]
+
+    resolver = AuthorResolver(path)
+    assert asyncio.run(resolve_all(resolver)) == [("Ann Lee", "MIT"), ("Ann Lee", "Stanford University"), ("Ann Lee", "MIT")]
+    assert fetched == [2023, 2024]
+    resolver.save()
+
+    # A later run reuses the saved speakers without crediting one year's affiliation to another.
+    assert asyncio.run(resolve_all(AuthorResolver(path))) == [("Ann Lee", "MIT"), ("Ann Lee", "Stanford University"), ("Ann Lee", "MIT")]
+    assert fetched == [2023, 2024]
+
+def test_ids_saved_without_a_year_are_dropped(tmp_path):
+    path = tmp_path / "authors.json"
+    path.write_text(json.dumps({"ids": {"icml.cc/42": ["Ann Lee", "MIT"]}, "names": {"Ann Lee/2023": "MIT"}}))
+    resolver = AuthorResolver(str(path))
+    assert resolver.by_id == {}
+    assert resolver.by_name == {"Ann Lee/2023": "MIT"}
+
+class CountingManifest(scrape.ScrapeManifest):
+    saves = 0
+
+    def save(self):
+        self.saves += 1
+
+class ListStore:
+    def __init__(self):
+        self.frames = []
+
+    def append(self, df):
+        self.frames.append(df)
+
+def test_manifest_is_saved_once_for_many_flushes(tmp_path):
+    manifest = CountingManifest(str(tmp_path / "papers.csv.manifest.json"))
+    pipeline = scrape.ScrapePipeline(None, [], manifest, ListStore(), 1, flush_rows=1)
+    rows = asyncio.Queue()
+    for id in range(20):
+        rows.put_nowait(("ICML", 2023, str(id), [("ICML", 2023, f"Paper {id}", "Ann Lee", "MIT")]))
+    rows.put_nowait(None)
+    asyncio.run(pipeline._write_rows(rows))
+    assert len(pipeline.store.frames) == 20
+    assert manifest.section("ICML", 2023)["papers"] == [str(id) for id in range(20)]
+    assert manifest.saves == 1
+
+def test_pages_fetched_during_their_year_are_revalidated(tmp_path):
+    cache = scrape.ResponseCache(str(tmp_path), 1 << 20, fresh_ttl=3600)
+    url = "https://neurips.cc/Conferences/2023/Schedule?type=Poster"
+    during = datetime.datetime(2023, 10, 1).timestamp()
+    after = datetime.datetime(2024, 1, 2).timestamp()
+    assert not cache.is_fresh(url, {"fetched_at": during})
+    assert cache.is_fresh(url, {"fetched_at": after})
+
+def test_interrupted_rescrape_leaves_no_duplicate_rows(tmp_path, monkeypatch):
+    output = str(tmp_path / "papers.csv")
+    row = ("ICML", 2023, "Paper A", "Ann Lee", "MIT")
+    store = scrape.open_paper_store(output)
+    store.append(pd.DataFrame([row], columns=scrape.PAPER_COLUMNS))
+
+    async def scrape_in_process(args, work, store, manifest):
+        store.append(pd.DataFrame([row], columns=scrape.PAPER_COLUMNS))
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(scrape, "scrape_in_process", scrape_in_process)
+    args = argparse.Namespace(output=output, offline=False, cache_dir="", years="2023", incremental=False, workers=1)
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(scrape.scrape_mode(args))
+    assert len(store.read()) == 1
@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from storage import PAPER_COLUMNS, open_paper_store
+
+pytest.importorskip("pyarrow")
+
+ROWS = [
+    ("ICML", 2023, "Paper A", "Ann Lee", "MIT"),
+    ("ICML", 2023, "Paper A", "Bo Chen", "n/a"),
+    ("ICML", 2023, "Paper B", "Cy Diaz", ""),
+    ("ICLR", 2024, "Paper C", "Ann Lee", "Stanford University"),
+    ("ICLR", 2024, "Paper C", "Di Evans", "n/a"),
+]
+
+def read_back(path):
+    store = open_paper_store(str(path))
+    store.append(pd.DataFrame(ROWS, columns=PAPER_COLUMNS))
+    df = store.read()
+    return df.sort_values(["Conference", "Year", "Title", "Author"], ignore_index=True)
+
+def test_csv_and_parquet_read_back_the_same_frame(tmp_path):
+    csv = read_back(tmp_path / "papers.csv")
+    parquet = read_back(tmp_path / "papers.parquet")
+    assert csv["Affiliation"].isna().sum() == 3
+    pd.testing.assert_frame_equal(csv, parquet, check_dtype=False, check_categorical=False)
+
+def test_parquet_imported_from_csv_matches_scraped(tmp_path):
+    read_back(tmp_path / "imported.csv")
+    imported = open_paper_store(str(tmp_path / "imported.parquet")).read()
+    imported = imported.sort_values(["Conference", "Year", "Title", "Author"], ignore_index=True)
+    scraped = read_back(tmp_path / "scraped.parquet")
+    pd.testing.assert_frame_equal(imported, scraped, check_dtype=False, check_categorical=False)